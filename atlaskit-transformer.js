@@ -8,25 +8,63 @@ const transformers = {
     "wiki": new WikiMarkupTransformer()
 }
 
-const readline = require('readline');
+function transform(input, inputfmt, outputfmt) {
+    let output = transformers[outputfmt].encode(transformers[inputfmt].parse(input));
+    if (typeof output !== 'string') {
+      output = JSON.stringify(output);
+    }
+    return output;
+}
 
-let args = process.argv.slice(2);
+// Match the line handling of the one-shot mode, where readline splits stdin into lines
+function normalise(text) {
+    const lines = text.split(/\r?\n|\r(?!\n)/);
+    if (lines[lines.length - 1] === '') {
+      lines.pop();
+    }
+    return lines.map((line) => line + "\n").join('');
+}
 
-const rl = readline.createInterface({
-  input: process.stdin,
-  output: process.stdout
-});
+function main(args) {
+  const readline = require('readline');  // required here so it isn't captured in a startup snapshot
 
-let input = '';
+  if (args[0] === '--server') {
+    // Long-lived worker: one JSON request {id, input, from, to} per line on stdin,
+    // one JSON response {id, output} or {id, error} per line on stdout.
+    console.log = console.info = console.warn = console.error;  // keep stdout for responses
+    const respond = (response) => process.stdout.write(JSON.stringify(response) + "\n");
+    readline.createInterface({ input: process.stdin }).on('line', (line) => {
+      let request = {};
+      try {
+        request = JSON.parse(line);
+        respond({ id: request.id, output: transform(normalise(request.input), request.from, request.to) + "\n" });
+      } catch (e) {
+        respond({ id: request.id, error: String((e && e.message) || e) });
+      }
+    });
+  } else {
+    const rl = readline.createInterface({
+      input: process.stdin,
+      output: process.stdout
+    });
 
-rl.on('line', (line) => {
-  input += line + "\n";
-});
+    let input = '';
 
-rl.on('close', () => {
-    let output = transformers[args[1]].encode(transformers[args[0]].parse(input));
-    if (typeof output !== 'string') {
-      output = JSON.stringify(output);
-    }
-    console.log(output);
-});
+    rl.on('line', (line) => {
+      input += line + "\n";
+    });
+
+    rl.on('close', () => {
+        console.log(transform(input, args[0], args[1]));
+    });
+  }
+}
+
+const v8 = require('v8');
+if (v8.startupSnapshot && v8.startupSnapshot.isBuildingSnapshot()) {
+  // `node --snapshot-blob <blob> --build-snapshot <bundle>`: the transformers above are initialised
+  // once at build time, and `node --snapshot-blob <blob> -- <args>` starts from that state.
+  v8.startupSnapshot.setDeserializeMainFunction(() => main(process.argv.slice(1)));
+} else {
+  main(process.argv.slice(2));
+}
@@ -13,7 +13,7 @@ if not logging.getLogger().handlers:
     )
 
 # Import main API components
-from .api import Fmt, clients, list_securityinsights, list_workspaces, query_all
+from .api import Fmt, clients, jira_issues, list_securityinsights, list_workspaces, query_all
 from .core import azcli, cache, logger, login
 from .legacy import export_jira_issues
 
@@ -27,5 +27,6 @@ __all__ = [
     "list_securityinsights",
     "query_all",
     "export_jira_issues",
+    "jira_issues",
     "Fmt",  # Export format enum for ibis support
 ]
@@ -10,6 +10,7 @@ __all__ = [
     "list_workspaces_safe",
     "list_workspaces",
     "list_subscriptions",
+    "resource_graph",
     "list_securityinsights_safe",
     "list_securityinsights",
     "chunks",
@@ -20,23 +21,26 @@ __all__ = [
     "atlaskit_transformer",
     "security_incidents",
     "security_alerts",
+    "jira_issues",
     "Plugin",
     "Fmt",  # Export format enum for ibis support
 ]
 
 import json
 import logging
-import pkgutil
+import math
+import re
 import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from functools import cached_property
-from importlib.metadata import version
 from pathlib import Path
-from subprocess import CalledProcessError, run
 
+import ibis
 import pandas
+import pyarrow.parquet as pq
 from atlassian import Jira
-from azure.identity import AzureCliCredential
-from azure.monitor.query import LogsBatchQuery, LogsQueryClient, LogsQueryStatus
+from azure.monitor.query import LogsBatchQuery, LogsQueryStatus
 from benedict import benedict
 from dbt.adapters.duckdb.plugins import BasePlugin, SourceConfig
 
@@ -52,7 +56,12 @@ from .core import (
     memoize_stampede,
     retryer,
 )
-from .frame import Fmt, as_pandas, format_output, memtable, read_parquet
+from .credentials import azure_credential, credential_pool
+from .datalake import partition_files
+from .frame import Fmt, format_output, memtable
+from .markdown import fast_transform, fast_transform_many
+from .scheduling import loganalytics_scheduler, workspace_stats
+from .transformer import transformer_pool
 
 logger = logging.getLogger(__name__)
 
@@ -137,12 +146,13 @@ class Clients:
 clients = Clients()
 
 
-@memoize_stampede(cache, expire=60 * 60 * 3)  # cache for 3 hours
+@memoize_stampede(cache, expire=60 * 60 * 3, ignore_args=True)  # one build per 3 hours
 def list_workspaces_safe(
-    fmt: str = "df",  # df, csv, json, list
-    agency: str = "ALL",
-):  # Agency alias or ALL
-    path = datalake_path()
+    fmt: str = "df",  # unused; kept for existing callers
+    agency: str = "ALL",  # unused; list_workspaces filters
+):
+    """Build the workspace list from the datalake CSVs and return its local parquet path."""
+    path = datalake_path(mirror=True)  # reference lists rarely change; revalidated per read
 
     # Use pandas for now (ibis migration in separate function)
     df = pandas.read_csv((path / "notebooks/lists/SentinelWorkspaces.csv").open())
@@ -155,6 +165,7 @@ def list_workspaces_safe(
     df = df.dropna(subset=["customerId"]).sort_values(by="alias").convert_dtypes().reset_index()
     persisted = f"{dirs.user_cache_dir}/list_workspaces.parquet"
     df.to_parquet(persisted)
+    cache.delete("customer_index")  # legacy tenant lookups are rebuilt from the new file
     return persisted
 
 
@@ -162,120 +173,368 @@ def list_workspaces(
     fmt: str = "df",  # df, csv, json, list, ibis
     agency: str = "ALL",
 ):  # Agency alias or ALL
-    # Load cached data
-    parquet_path = list_workspaces_safe(fmt, agency)
-    expr = read_parquet(parquet_path)
-
-    # Filter by agency if needed
+    # Query the cached list in duckdb, so the agency filter and list projection run in the scan
+    workspaces = ibis.duckdb.connect().read_parquet(list_workspaces_safe())
     if agency != "ALL":
-        df = as_pandas(expr)  # Use pandas for filtering for now
-        expr = df[df["alias"] == agency]
+        workspaces = workspaces.filter(workspaces["alias"] == agency)
 
-    # Handle special list format (customerId unique)
+    # Handle special list format (customerId unique, in list order)
     if fmt == "list":
-        df = as_pandas(expr)
-        return list(df["customerId"].unique())
+        return list(workspaces.select("customerId").to_pandas()["customerId"].unique())
 
-    # Use frame abstraction for other formats
-    return format_output(expr, fmt)
+    if fmt == "ibis":
+        return workspaces
+    # duckdb hands back numpy dtypes (nullable ints as float), so restore the nullable dtypes
+    # the list was built with before formatting
+    return format_output(workspaces.to_pandas().convert_dtypes(), fmt)
 
 
 def list_subscriptions():
     return pandas.DataFrame(azcli(["account", "list"]))["id"].unique()
 
 
+_ARM = "https://management.azure.com"
+
+
+def _arm_send(client: httpx.Client, method: str, url: str, **kwargs) -> dict:
+    token = azure_credential.get_token(f"{_ARM}/.default").token
+    response = client.request(method, url, headers={"Authorization": f"Bearer {token}"}, **kwargs)
+    response.raise_for_status()  # throttling (429) and server errors are retried by the caller
+    return response.json()
+
+
+def _arm_subscriptions(client: httpx.Client) -> list[str]:
+    """Ids of every subscription the current identity can see, following nextLink pages."""
+    subscriptions, url = [], "/subscriptions?api-version=2022-12-01"
+    while url:
+        page = retryer(_arm_send, client, "GET", url)
+        subscriptions += [subscription["subscriptionId"] for subscription in page["value"]]
+        url = page.get("nextLink")
+    return subscriptions
+
+
+def resource_graph(
+    query: str,
+    subscriptions: list[str] | None = None,
+    subscriptions_per_request: int = 100,
+    max_workers: int = 4,
+) -> pandas.DataFrame:
+    """
+    Run an Azure Resource Graph query in-process and return every row as a DataFrame.
+
+    Subscriptions (default: all visible to the Azure credential) are split into groups queried
+    concurrently, each following `$skipToken` until its results are complete, so large estates
+    are not truncated at one page. Rows are only combined across groups, so joins must match
+    resources within a subscription.
+    """
+    with httpx.Client(base_url=_ARM, timeout=60) as client:
+        if subscriptions is None:
+            subscriptions = _arm_subscriptions(client)
+
+        def fetch(group: list[str]) -> list[dict]:
+            rows: list[dict] = []
+            options: dict = {"resultFormat": "objectArray", "$top": 1000}
+            while True:
+                page = retryer(
+                    _arm_send,
+                    client,
+                    "POST",
+                    "/providers/Microsoft.ResourceGraph/resources?api-version=2022-10-01",
+                    json={"subscriptions": group, "query": query, "options": options},
+                )
+                rows += page["data"]
+                if not page.get("$skipToken"):
+                    return rows
+                options = options | {"$skipToken": page["$skipToken"]}
+
+        groups = list(chunks(subscriptions, subscriptions_per_request))
+        if not groups:
+            return pandas.DataFrame()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as executor:
+            results = list(executor.map(fetch, groups))
+    return pandas.DataFrame([row for rows in results for row in rows])
+
+
+_SECURITYINSIGHTS_QUERY = """
+resources
+| where type =~ 'microsoft.operationsmanagement/solutions'
+| where name startswith 'SecurityInsights'
+| project wlid = tolower(tostring(properties.workspaceResourceId))
+| join kind=leftouter (
+    resources | where type =~ 'microsoft.operationalinsights/workspaces' | extend wlid = tolower(id))
+    on wlid
+| extend customerId = properties.customerId
+"""
+
+
 @memoize_stampede(cache, expire=60 * 60 * 3)  # cache for 3 hours
-def list_securityinsights_safe():
-    return azcli(
-        [
-            "graph",
-            "query",
-            "--first",
-            "1000",
-            "-q",
-            """
-        resources
-        | where type =~ 'microsoft.operationsmanagement/solutions'
-        | where name startswith 'SecurityInsights'
-        | project wlid = tolower(tostring(properties.workspaceResourceId))
-        | join kind=leftouter (
-            resources | where type =~ 'microsoft.operationalinsights/workspaces' | extend wlid = tolower(id))
-            on wlid
-        | extend customerId = properties.customerId
-        """,
-        ]
-    )["data"]
+def list_securityinsights_safe() -> pandas.DataFrame:
+    """Sentinel-enabled workspaces across every visible subscription, from Resource Graph."""
+    return resource_graph(_SECURITYINSIGHTS_QUERY)
 
 
 def list_securityinsights(fmt: str = "df"):
     """List Azure Security Insights resources."""
-    data = list_securityinsights_safe()
+    data = list_securityinsights_safe().copy()  # callers may modify it; keep the cached frame
     expr = memtable(data)
     return format_output(expr, fmt)
 
 
+# Recent execution times (seconds) of each query on each workspace, keyed by (query, workspace)
+_latencies: defaultdict[tuple[str, str], deque[float]] = defaultdict(lambda: deque(maxlen=50))
+
+
+def _seconds(value) -> float:
+    """Convert a number of seconds, a timedelta string or a Timedelta to float seconds."""
+    if isinstance(value, int | float):
+        return float(value)
+    return pandas.Timedelta(value).total_seconds()
+
+
+def _remaining(deadline_at: float | None) -> float | None:
+    """Seconds left before `deadline_at` (a `time.monotonic` value), or None without a deadline."""
+    if deadline_at is None:
+        return None
+    return max(0.0, deadline_at - time.monotonic())
+
+
+def _hedge_timeout(
+    query: str, workspace: str, hedge_percentile: float | None, server_timeout: float | None
+) -> int | None:
+    """
+    Server timeout to send the first attempt of `query` on `workspace` with, from the latencies
+    recently observed for that query on that workspace. Without enough history the attempt is
+    sent with the full `server_timeout`.
+    """
+    history = _latencies.get((query, workspace))
+    if hedge_percentile is None or history is None or len(history) < 5:
+        return None
+    threshold = math.ceil(pandas.Series(list(history)).quantile(hedge_percentile))
+    if server_timeout is not None and threshold >= server_timeout:
+        return None
+    return max(threshold, 1)
+
+
+def _timed_out(result) -> bool:
+    """True for a failed result that ran out of server time rather than failing in the query."""
+    if result.status != LogsQueryStatus.FAILURE:
+        return False
+    text = f"{getattr(result, 'code', '')} {getattr(result, 'message', '')}"
+    return re.search(r"time ?out|timed out", text, re.IGNORECASE) is not None
+
+
+def _latency_sample(request, result) -> tuple[str, float, int] | None:
+    """Return `(workspace, execution_seconds, row_count)` for a result that reported statistics."""
+    statistics = getattr(result, "statistics", None) or {}
+    execution_time = statistics.get("query", {}).get("executionTime")
+    if execution_time is None:
+        return None
+    tables = result.partial_data if result.status == LogsQueryStatus.PARTIAL else result.tables
+    return request.workspace, float(execution_time), sum(len(table.rows) for table in tables)
+
+
+def _run_batches(
+    pool, query_requests, batch_size, batch_delay, deadline_at=None, priority="interactive"
+):
+    """
+    Run `query_requests` through `query_batch` on the identities in `pool`, one batch in flight per
+    identity, taking turns with other callers on this host through `loganalytics_scheduler`.
+    Returns results keyed by request id, and the requests that did not finish before `deadline_at`.
+    """
+    results, unfinished, in_flight = {}, [], {}
+    pending = deque(chunks(query_requests, batch_size))
+    executor = ThreadPoolExecutor(max_workers=len(pool), thread_name_prefix="loganalytics")
+    try:
+        while pending or in_flight:
+            while pending:
+                if _remaining(deadline_at) == 0:
+                    unfinished += [request for batch in pending for request in batch]
+                    pending.clear()
+                    break
+                member = pool.checkout(
+                    len(pending[0]), timeout=0 if in_flight else _remaining(deadline_at)
+                )
+                if member is None:
+                    break  # every identity is busy, collect a finished batch first
+                request_batch = pending.popleft()
+                if not loganalytics_scheduler.acquire(
+                    priority,
+                    cost=len(request_batch),
+                    rate=batch_size / batch_delay if batch_delay else math.inf,
+                    burst=batch_size,
+                    timeout=_remaining(deadline_at),
+                    name=member.bucket,
+                ):
+                    pool.release(member)
+                    unfinished += request_batch
+                    continue
+                future = executor.submit(member.client.query_batch, request_batch)
+                in_flight[future] = (member, request_batch, pandas.Timestamp("now"))
+            if not in_flight:
+                continue
+            done, _ = wait(in_flight, timeout=_remaining(deadline_at), return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning(f"Deadline passed waiting on {len(in_flight)} batches of queries")
+                for member, request_batch, _ in in_flight.values():
+                    pool.release(member)
+                    unfinished += request_batch
+                in_flight.clear()
+                continue
+            for future in done:
+                member, request_batch, batch_start = in_flight.pop(future)
+                pool.release(member)
+                samples = []
+                for request, result in zip(request_batch, future.result()):
+                    results[request.id] = result
+                    if sample := _latency_sample(request, result):
+                        _latencies[request.body["query"], request.workspace].append(sample[1])
+                        samples.append(sample)
+                workspace_stats.record(samples)
+                duration = pandas.Timestamp("now") - batch_start
+                logger.info(
+                    f"Completed {len(results)} (+{len(request_batch)}) in {duration} as {member.name}"
+                )
+    finally:
+        for member, _, _ in in_flight.values():
+            pool.release(member)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results, unfinished
+
+
+def _result_frame(request, result, workspaces, sentinel_workspaces) -> pandas.DataFrame:
+    """Convert a single workspace query result into a DataFrame tagged with tenant and alias."""
+    if result.status == LogsQueryStatus.PARTIAL:
+        tables = result.partial_data
+        tables = [pandas.DataFrame(table.rows, columns=table.columns) for table in tables]
+    elif result.status == LogsQueryStatus.SUCCESS:
+        tables = result.tables
+        tables = [pandas.DataFrame(table.rows, columns=table.columns) for table in tables]
+    else:
+        tables = [pandas.DataFrame([result.__dict__])]
+    df = pandas.concat(tables).dropna(axis=1, how="all")  # prune empty columns
+    df["TenantId"] = request.workspace
+    alias = workspaces.query(f'customerId == "{request.workspace}"')["alias"].str.cat()
+    if alias == "":
+        alias = sentinel_workspaces.query(f'customerId == "{request.workspace}"')["name"].str.cat()
+    df["_alias"] = alias
+    return df
+
+
 def loganalytics_query(
     queries: list[str],
     timespan=pandas.Timedelta("14d"),
     batch_size=190,
     batch_delay=32,
     sentinel_workspaces=None,
+    server_timeout=None,
+    deadline=None,
+    hedge_percentile=None,
+    priority="interactive",
 ):
     """
     Run queries across all workspaces, in batches of `batch_size` with a minimum delay of `batch_delay` between batches.
+    Workspaces are scheduled longest-expected-first from the latencies recorded in `workspace_stats`,
+    so the slow tenants share the first batches rather than stretching the last one.
+
+    `server_timeout` caps how long (in seconds) each workspace query may run server side. `deadline`
+    (seconds or a timedelta) bounds the whole call: once it passes, finished results are returned and
+    the workspaces that did not finish are listed in each result's `attrs["unfinished_workspaces"]`.
+    With `hedge_percentile` (e.g. 0.9), first attempts run with a server timeout at that percentile of
+    the latencies recently observed for the same query on the same workspace (queries without that
+    history run uncut), and attempts that hit it are re-issued after the rest have returned.
+    `priority` ("interactive" or "bulk") is the class batches queue in on `loganalytics_scheduler`.
     Returns a dictionary of queries and results
     """
-    client = LogsQueryClient(AzureCliCredential())
+    pool = credential_pool()
     workspaces = list_workspaces(fmt="df")
     if sentinel_workspaces is None:
         sentinel_workspaces = list_securityinsights()
-    query_requests, results = [], []
+    deadline_at = None if deadline is None else time.monotonic() + _seconds(deadline)
+    query_requests, hedged = [], {}
     for query in queries:
         for workspace_id in sentinel_workspaces["customerId"]:
-            query_requests.append(
-                LogsBatchQuery(workspace_id=workspace_id, query=query, timespan=timespan)
+            hedge_timeout = _hedge_timeout(query, workspace_id, hedge_percentile, server_timeout)
+            request = LogsBatchQuery(
+                workspace_id=workspace_id,
+                query=query,
+                timespan=timespan,
+                server_timeout=hedge_timeout or server_timeout,
+                include_statistics=True,
             )
+            if hedge_timeout:
+                hedged[request.id] = hedge_timeout
+            query_requests.append(request)
+    order = workspace_stats.order(dict.fromkeys(sentinel_workspaces["customerId"]))
+    rank = {workspace_id: i for i, workspace_id in enumerate(order)}
+    scheduled = sorted(query_requests, key=lambda request: rank[request.workspace])
     querytime = pandas.Timestamp("now")
     logger.info(f"Executing {len(query_requests)} queries at {querytime}")
-    for request_batch in chunks(query_requests, batch_size):
-        while cache.get("loganalytics_query_running"):
-            time.sleep(1)
-        batch_start = pandas.Timestamp("now")
-        cache.set("loganalytics_query_running", True, batch_delay)
-        results += client.query_batch(request_batch)
-        duration = pandas.Timestamp("now") - batch_start
-        logger.info(f"Completed {len(results)} (+{len(request_batch)}) in {duration}")
-    dfs = {}
-    for request, result in zip(query_requests, results):
-        if result.status == LogsQueryStatus.PARTIAL:
-            tables = result.partial_data
-            tables = [pandas.DataFrame(table.rows, columns=table.columns) for table in tables]
-        elif result.status == LogsQueryStatus.SUCCESS:
-            tables = result.tables
-            tables = [pandas.DataFrame(table.rows, columns=table.columns) for table in tables]
-        else:
-            tables = [pandas.DataFrame([result.__dict__])]
-        df = pandas.concat(tables).dropna(axis=1, how="all")  # prune empty columns
-        df["TenantId"] = request.workspace
-        alias = workspaces.query(f'customerId == "{request.workspace}"')["alias"].str.cat()
-        if alias == "":
-            alias = sentinel_workspaces.query(f'customerId == "{request.workspace}"')[
-                "name"
-            ].str.cat()
-        df["_alias"] = alias
-        query = request.body["query"]
-        if query in dfs:
-            dfs[query].append(df)
-        else:
-            dfs[query] = [df]
-    return {
-        query: pandas.concat(results, ignore_index=True).convert_dtypes()
-        for query, results in dfs.items()
-    }
+    results, unfinished = _run_batches(
+        pool, scheduled, batch_size, batch_delay, deadline_at, priority
+    )
+    outliers = [
+        request
+        for request in query_requests
+        if request.id in hedged and request.id in results and _timed_out(results[request.id])
+    ]
+    if outliers:
+        logger.info(f"Re-issuing {len(outliers)} queries that ran past their hedge timeout")
+        retries = [
+            LogsBatchQuery(
+                workspace_id=request.workspace,
+                query=request.body["query"],
+                timespan=timespan,
+                server_timeout=server_timeout,
+                include_statistics=True,
+            )
+            for request in outliers
+        ]
+        retried, _ = _run_batches(pool, retries, batch_size, batch_delay, deadline_at, priority)
+        for request, retry in zip(outliers, retries):
+            if retry.id in retried:
+                results[request.id] = retried[retry.id]
+    dfs = {query: [] for query in queries}
+    for request in query_requests:
+        if request.id in results:
+            df = _result_frame(request, results[request.id], workspaces, sentinel_workspaces)
+            dfs[request.body["query"]].append(df)
+    unfinished_workspaces = {query: [] for query in queries}
+    for request in unfinished:
+        unfinished_workspaces[request.body["query"]].append(request.workspace)
+    if unfinished:
+        logger.warning(
+            f"{len(unfinished)} queries did not finish before the deadline: "
+            f"{sorted(set(request.workspace for request in unfinished))}"
+        )
+    output = {}
+    for query, frames in dfs.items():
+        df = (
+            pandas.concat(frames, ignore_index=True).convert_dtypes()
+            if frames
+            else pandas.DataFrame()
+        )
+        df.attrs["unfinished_workspaces"] = unfinished_workspaces[query]
+        output[query] = df
+    return output
 
 
-def query_all(query, fmt="df", timespan=pandas.Timedelta("14d")):
-    """Execute KQL queries across Azure Sentinel workspaces."""
+def query_all(
+    query,
+    fmt="df",
+    timespan=pandas.Timedelta("14d"),
+    server_timeout=None,
+    deadline=None,
+    hedge_percentile=None,
+    priority="interactive",
+    return_unfinished=False,
+):
+    """Execute KQL queries across Azure Sentinel workspaces.
+
+    `server_timeout`, `deadline`, `hedge_percentile` and `priority` are passed to `loganalytics_query`;
+    workspaces that missed the deadline are listed in the DataFrame's `attrs["unfinished_workspaces"]`.
+    Only `fmt="df"` keeps attrs, so with `return_unfinished=True` the result comes back as a
+    `(result, unfinished_workspaces)` pair for any `fmt`.
+    """
     try:
         # Check query is not a plain string and is iterable
         assert not isinstance(query, str)
@@ -285,7 +544,14 @@ def query_all(query, fmt="df", timespan=pandas.Timedelta("14d")):
         query = [query]
 
     # Execute queries and get results
-    results = loganalytics_query(query, timespan)
+    results = loganalytics_query(
+        query,
+        timespan,
+        server_timeout=server_timeout,
+        deadline=deadline,
+        hedge_percentile=hedge_percentile,
+        priority=priority,
+    )
 
     # Concatenate all results
     dfs = list(results.values())
@@ -294,9 +560,14 @@ def query_all(query, fmt="df", timespan=pandas.Timedelta("14d")):
     else:
         # Use pandas concat for now, could use ibis union later
         expr = pandas.concat(dfs, ignore_index=True)
+    unfinished = sorted(
+        {workspace for df in dfs for workspace in df.attrs.get("unfinished_workspaces", [])}
+    )
+    expr.attrs["unfinished_workspaces"] = unfinished
 
     # Format output using frame abstraction
-    return format_output(expr, fmt)
+    result = format_output(expr, fmt)
+    return (result, unfinished) if return_unfinished else result
 
 
 columns_of_interest = benedict(
@@ -391,7 +662,17 @@ def hunt(
     workspaces=None,
     timespans=["1d", "14d", "90d", "700d"],
     take=5000,
+    server_timeout=None,
+    deadline=None,
+    hedge_percentile=None,
+    priority="bulk",
 ):
+    """
+    Search `columns` across workspaces for `indicators`, widening through `timespans` until found.
+    `deadline` bounds the whole hunt; if it passes, the results so far are returned with the
+    workspaces that did not finish in `attrs["unfinished_workspaces"]`.
+    """
+    deadline_at = None if deadline is None else time.monotonic() + _seconds(deadline)
     queries = []
     if workspaces is None:
         workspaces = list_securityinsights()
@@ -423,13 +704,24 @@ def hunt(
                 final_query = finalise_query(f"find where {query}", take)
                 queries.append(final_query)
     for timespan in timespans:
-        results = pandas.concat(
-            loganalytics_query(
-                queries, pandas.Timedelta(timespan), sentinel_workspaces=workspaces
-            ).values()
+        dfs = loganalytics_query(
+            queries,
+            pandas.Timedelta(timespan),
+            sentinel_workspaces=workspaces,
+            server_timeout=server_timeout,
+            deadline=_remaining(deadline_at),
+            hedge_percentile=hedge_percentile,
+            priority=priority,
+        ).values()
+        results = pandas.concat(dfs)
+        results.attrs["unfinished_workspaces"] = sorted(
+            {workspace for df in dfs for workspace in df.attrs["unfinished_workspaces"]}
         )
         if "placeholder_" in results.columns:
             results = results.drop("placeholder_", axis=1)
+        if results.attrs["unfinished_workspaces"] and _remaining(deadline_at) == 0:
+            logger.warning(f"Hunt deadline passed during {timespan}, returning partial results")
+            return results
         if results.empty:
             logger.info(f"No results in {timespan}, extending hunt")
             continue
@@ -439,24 +731,32 @@ def hunt(
         raise Exception("No results found!")
 
 
-def atlaskit_transformer(inputtext, inputfmt="md", outputfmt="wiki", runtime="node"):
-    """Transform text using the atlaskit transformer bundle."""
-    bundle_data = pkgutil.get_data("wagov_squ", "atlaskit-transformer.bundle.js")
-    if bundle_data is None:
-        raise FileNotFoundError("atlaskit-transformer.bundle.js not found in wagov_squ package")
+def atlaskit_transformer(
+    inputtext, inputfmt="md", outputfmt="wiki", runtime="node", workers=1, fastpath=True
+):
+    """
+    Transform text using the atlaskit transformer bundle. Documents are sent to a pool of `workers`
+    long-lived transformer processes, started on first use, instead of a new process per call.
 
-    # Cache the bundle using the current package version
-    transformer = dirs.user_cache_path / f"atlaskit-transformer.bundle_v{version('wagov_squ')}.js"
-    if not transformer.exists():
-        transformer.parent.mkdir(parents=True, exist_ok=True)
-        transformer.write_bytes(bundle_data)
+    Markdown limited to headings, paragraphs, bullets, bold, links and fenced code is rendered to wiki
+    or ADF in-process unless `fastpath` is False; only other documents go to the transformer.
 
-    cmd = [runtime, str(transformer), inputfmt, outputfmt]
-    logger.debug(" ".join(cmd))
-    try:
-        return run(cmd, input=inputtext, text=True, capture_output=True, check=True).stdout
-    except CalledProcessError:
-        run(cmd, input=inputtext, text=True, check=True)
+    Pass a list of documents to convert them in one pipelined batch; the result is a list in the same
+    order, with a `TransformError` in place of any document that failed.
+    """
+    if isinstance(inputtext, str):
+        if fastpath and (output := fast_transform(inputtext, inputfmt, outputfmt)) is not None:
+            return output
+        return transformer_pool(runtime, workers).transform(inputtext, inputfmt, outputfmt)
+    texts = list(inputtext)
+    outputs = fast_transform_many(texts, inputfmt, outputfmt) if fastpath else [None] * len(texts)
+    missing = [i for i, output in enumerate(outputs) if output is None]
+    if missing:
+        pool = transformer_pool(runtime, workers)
+        converted = pool.transform_many([texts[i] for i in missing], inputfmt, outputfmt)
+        for i, output in zip(missing, converted):
+            outputs[i] = output
+    return outputs
 
 
 def security_incidents(
@@ -466,7 +766,7 @@ def security_incidents(
     # Queries for security incidents from `start` time for `timedelta` and returns a dataframe
     # Sorts by TimeGenerated (TODO)
     query = "SecurityIncident | summarize arg_max(TimeGenerated, *) by IncidentNumber"
-    return query_all(query, timespan=(start.to_pydatetime(), timedelta))
+    return query_all(query, timespan=(start.to_pydatetime(), timedelta), priority="bulk")
 
 
 def security_alerts(
@@ -476,7 +776,92 @@ def security_alerts(
     # Queries for security alerts from `start` time for `timedelta` and returns a dataframe
     # Sorts by TimeGenerated (TODO)
     query = "SecurityAlert | summarize arg_max(TimeGenerated, *) by SystemAlertId"
-    return query_all(query, timespan=(start.to_pydatetime(), timedelta))
+    return query_all(query, timespan=(start.to_pydatetime(), timedelta), priority="bulk")
+
+
+def jira_issues(
+    start=None,
+    end=None,
+    columns: list[str] | None = None,
+    fmt: str = "df",  # df, csv, json, list, ibis
+):
+    """
+    Read issues exported by `export_jira_issues` that were updated in [start, end), as `fmt`.
+
+    Only the day and month partitions overlapping the range are opened, and the column selection
+    and `updated` filter are pushed down to duckdb's parquet scan, so reports read just the files,
+    row groups and columns they need. Naive `start`/`end` are taken as UTC. Each partition holds
+    the state of an issue on the day it was last updated, so an issue edited on several days
+    appears once per day; `jira_outputs/issues_current` holds one row per issue. Partitions
+    written before the typed columns are scanned separately and filtered on the `updated` stamp in
+    their `fields` JSON, so only they pay for reading it.
+    """
+    start = None if start is None else pandas.Timestamp(start)
+    end = None if end is None else pandas.Timestamp(end)
+    # Partitions are named by Jira's local date, so allow a day either side of the UTC range
+    margin = pandas.Timedelta(days=1)
+    files = partition_files(
+        datalake_path() / "jira_outputs" / "issues",
+        None if start is None else start - margin,
+        None if end is None else end + margin,
+    )
+    if not files:
+        return format_output(pandas.DataFrame(columns=columns or []), fmt)
+
+    con = ibis.duckdb.connect()
+    if str(files[0]).startswith("az://"):
+        con.con.register_filesystem(files[0].fs)
+    typed, baseline = [], []
+    for path in files:
+        (typed if "updated" in _parquet_columns(path) else baseline).append(str(path))
+    parts = []
+    for paths in typed, baseline:
+        if not paths:
+            continue
+        issues = con.read_parquet(paths, union_by_name=True)
+        if paths is baseline:
+            # Partitions from before typed columns only hold `updated` in the `fields` JSON
+            stamp = issues.fields.cast("json")["updated"].unwrap_as("string")
+            issues = issues.mutate(updated=stamp.cast("timestamp('UTC')"))
+        if start is not None:
+            issues = issues.filter(issues.updated >= _utc(start))
+        if end is not None:
+            issues = issues.filter(issues.updated < _utc(end))
+        parts.append(
+            issues.select(*(c for c in columns if c in issues.columns)) if columns else issues
+        )
+    issues = _union_by_name(parts)
+    return format_output(issues.select(columns) if columns else issues, fmt)
+
+
+def _parquet_columns(path) -> list[str]:
+    with path.open("rb") as stream:
+        return pq.read_schema(stream).names
+
+
+def _union_by_name(tables: list[ibis.Table]) -> ibis.Table:
+    """Union `tables` by column name, filling columns missing from a table with typed nulls."""
+    if len(tables) == 1:
+        return tables[0]
+    schema = {}
+    for table in tables:
+        for name, dtype in table.schema().items():
+            schema.setdefault(name, dtype)
+    return ibis.union(
+        *(
+            table.select(
+                [
+                    (table[name] if name in table.columns else ibis.null()).cast(dtype).name(name)
+                    for name, dtype in schema.items()
+                ]
+            )
+            for table in tables
+        )
+    )
+
+
+def _utc(timestamp: pandas.Timestamp) -> pandas.Timestamp:
+    return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
 
 
 class Plugin(BasePlugin):
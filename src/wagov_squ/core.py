@@ -23,7 +23,7 @@ import time
 from collections.abc import Callable
 from functools import wraps
 from pathlib import Path
-from threading import RLock
+from threading import Lock, RLock
 from typing import Any
 
 import httpx
@@ -33,6 +33,8 @@ from platformdirs import PlatformDirs
 from tenacity import Retrying, stop_after_attempt, wait_random_exponential
 from upath import UPath
 
+from .datalake import MirrorPath
+
 logger = logging.getLogger(__name__)
 
 
@@ -96,17 +98,33 @@ class MemoryCache:
 cache = MemoryCache()
 
 
-def memoize_stampede(cache_obj: MemoryCache, expire: float) -> Callable:
-    """Minimal memoization decorator compatible with the previous diskcache call sites."""
+def memoize_stampede(cache_obj: MemoryCache, expire: float, ignore_args: bool = False) -> Callable:
+    """
+    Minimal memoization decorator compatible with the previous diskcache call sites. Concurrent
+    callers with the same key wait for one computation instead of each running `func`. With
+    `ignore_args`, every call shares one entry, for functions whose result ignores their arguments.
+    """
 
     def decorator(func: Callable) -> Callable:
+        locks: dict[str, Lock] = {}
+        locks_lock = Lock()
+        missing = object()
+
         @wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            key = f"memo:{func.__module__}.{func.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
-            if key in cache_obj:
-                return cache_obj[key]
-            value = func(*args, **kwargs)
-            cache_obj.set(key, value, expire)
+            key = f"memo:{func.__module__}.{func.__qualname__}"
+            if not ignore_args:
+                key += f":{args!r}:{sorted(kwargs.items())!r}"
+            value = cache_obj.get(key, missing)
+            if value is not missing:
+                return value
+            with locks_lock:
+                lock = locks.setdefault(key, Lock())
+            with lock:
+                value = cache_obj.get(key, missing)  # computed while we waited
+                if value is missing:
+                    value = func(*args, **kwargs)
+                    cache_obj.set(key, value, expire)
             return value
 
         return wrapper
@@ -319,6 +337,15 @@ def datalake_path_safe(expiry_days, permissions):
 def datalake_path(
     expiry_days: int = 3,  # Number of days until the SAS token expires
     permissions: str = "racwdlt",  # Permissions to grant on the SAS token
+    mirror: bool = False,  # Serve unchanged files from a local mirror under the user cache dir
 ):
     container, account, sas = datalake_path_safe(expiry_days, permissions)
+    if mirror:
+        # Paths joined from this one keep its options, so they all read through the mirror
+        return MirrorPath(
+            f"mirror://{container}",
+            remote_protocol="az",
+            remote_options={"account_name": account, "sas_token": sas},
+            directory=str(dirs.user_cache_path / "datalake-mirror"),
+        )
     return UPath(f"az://{container}", account_name=account, sas_token=sas)
@@ -0,0 +1,194 @@
+"""Azure identities used to run Log Analytics queries."""
+
+__all__ = [
+    "CachedTokenCredential",
+    "azure_credential",
+    "PooledClient",
+    "CredentialPool",
+    "credential_pool",
+]
+
+import logging
+import threading
+import time
+
+from azure.core.credentials import AccessToken
+from azure.identity import AzureCliCredential, ClientSecretCredential, ManagedIdentityCredential
+from azure.monitor.query import LogsQueryClient
+
+from .core import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CachedTokenCredential:
+    """
+    Thread-safe wrapper for an azure-identity credential that caches access tokens per scope until
+    shortly before expiry, refreshing them in the background as expiry nears. Only the first request
+    for a scope waits on the underlying credential (for the Azure CLI, an `az` subprocess).
+
+    The default refresh margin sits inside the 5 minutes before expiry in which the Azure CLI hands
+    out a new token rather than its cached one. A background refresh that still returns the same
+    expiry is not repeated for that token, so callers never start an `az` subprocess per request.
+    """
+
+    def __init__(self, credential, refresh_margin: float = 240, expiry_margin: float = 60) -> None:
+        self.credential = credential
+        self.refresh_margin = refresh_margin  # seconds before expiry to start a background refresh
+        self.expiry_margin = expiry_margin  # seconds before expiry a cached token stops being used
+        self._tokens: dict[tuple, AccessToken] = {}
+        self._locks: dict[tuple, threading.Lock] = {}
+        self._refreshing: set[tuple] = set()
+        self._unchanged: dict[tuple, float] = {}  # expiry a background refresh could not extend
+        self._lock = threading.Lock()
+
+    def get_token(self, *scopes: str, claims=None, tenant_id=None, **kwargs) -> AccessToken:
+        if claims:  # claims challenges need a fresh token from the credential
+            return self.credential.get_token(*scopes, claims=claims, tenant_id=tenant_id, **kwargs)
+        key = (scopes, tenant_id)
+        with self._lock:
+            token = self._tokens.get(key)
+        now = time.time()
+        if token is None or token.expires_on - self.expiry_margin <= now:
+            return self._fetch(key, token, **kwargs)
+        if (
+            token.expires_on - self.refresh_margin <= now
+            and self._unchanged.get(key) != token.expires_on
+        ):
+            self._refresh_in_background(key, **kwargs)
+        return token
+
+    def _fetch(self, key: tuple, stale: AccessToken | None = None, **kwargs) -> AccessToken:
+        """Fetch a token for `key`, letting concurrent callers share one request."""
+        with self._lock:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                token = self._tokens.get(key)
+            if token is None or token is stale:
+                scopes, tenant_id = key
+                if tenant_id:
+                    kwargs["tenant_id"] = tenant_id
+                token = self.credential.get_token(*scopes, **kwargs)
+                with self._lock:
+                    self._tokens[key] = token
+            return token
+
+    def _refresh_in_background(self, key: tuple, **kwargs) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                stale = self._tokens.get(key)
+                token = self._fetch(key, stale, **kwargs)
+                if stale is not None and token.expires_on == stale.expires_on:
+                    with self._lock:
+                        self._unchanged[key] = token.expires_on
+            except Exception as e:
+                logger.warning(f"Background token refresh for {key[0]} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name="token-refresh", daemon=True).start()
+
+    def close(self) -> None:
+        self.credential.close()
+
+
+azure_credential = CachedTokenCredential(AzureCliCredential())
+
+
+class PooledClient:
+    """A Log Analytics client for one identity, with its own rate bucket name and load counter."""
+
+    def __init__(self, name: str, credential, client=None) -> None:
+        self.name = name
+        self.credential = credential
+        self.client = client or LogsQueryClient(credential)
+        self.bucket = f"loganalytics:{name}"  # per-identity pacing in the scheduler
+        self.load = 0  # queries dispatched through this identity
+        self.busy = False
+
+
+class CredentialPool:
+    """
+    Identities to spread Log Analytics batches across, each running at most one batch at a time.
+    `strategy` picks the next idle identity: "round_robin" or "least_loaded" (fewest queries sent).
+    """
+
+    def __init__(self, members: list[PooledClient], strategy: str = "least_loaded") -> None:
+        if not members:
+            raise ValueError("A credential pool needs at least one member")
+        if strategy not in ("round_robin", "least_loaded"):
+            raise ValueError(f"Unknown credential strategy {strategy!r}")
+        self.members = members
+        self.strategy = strategy
+        self._cond = threading.Condition()
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def checkout(self, cost: int = 1, timeout: float | None = None) -> PooledClient | None:
+        """Reserve an idle member for a batch of `cost` queries, waiting up to `timeout` seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                idle = [m for m in self.members if not m.busy]
+                if idle:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if self.strategy == "round_robin":
+                ordered = self.members[self._next :] + self.members[: self._next]
+                member = next(m for m in ordered if not m.busy)
+                self._next = (self.members.index(member) + 1) % len(self.members)
+            else:
+                member = min(idle, key=lambda m: m.load)
+            member.busy = True
+            member.load += cost
+            return member
+
+    def release(self, member: PooledClient) -> None:
+        with self._cond:
+            member.busy = False
+            self._cond.notify_all()
+
+
+def _credential(entry: dict):
+    """Build an azure-identity credential from a `loganalytics_credentials` config entry."""
+    if entry.get("client_secret"):
+        return ClientSecretCredential(
+            entry["tenant_id"], entry["client_id"], entry["client_secret"]
+        )
+    return ManagedIdentityCredential(client_id=entry.get("client_id"))
+
+
+def credential_pool() -> CredentialPool:
+    """
+    Return the process-wide pool of Log Analytics identities from the `loganalytics_credentials`
+    setting, or a single Azure CLI identity when none are configured.
+    """
+    pool = cache.get("loganalytics_pool")
+    if pool is not None:
+        return pool
+    config = cache.get("config")
+    entries = (config.get("loganalytics_credentials") if config else None) or []
+    if entries:
+        members = [
+            PooledClient(entry["name"], CachedTokenCredential(_credential(entry)))
+            for entry in entries
+        ]
+        strategy = config.get("loganalytics_credential_strategy") or "least_loaded"
+        logger.info(f"Using {len(members)} pooled Log Analytics identities ({strategy})")
+    else:
+        members, strategy = [PooledClient("azure_cli", azure_credential)], "least_loaded"
+    pool = CredentialPool(members, strategy)
+    cache.set("loganalytics_pool", pool)
+    return pool
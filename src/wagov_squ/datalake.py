@@ -0,0 +1,323 @@
+"""Local mirroring and maintenance helpers for files and parquet exports in the datalake."""
+
+__all__ = ["MirrorFileSystem", "MirrorPath", "partition_files", "compact_partitions"]
+
+import contextlib
+import hashlib
+import logging
+import re
+import sqlite3
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import closing
+from pathlib import Path
+
+import fsspec
+import pandas
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fsspec import AbstractFileSystem
+from upath import UPath
+from upath.registry import register_implementation
+
+logger = logging.getLogger(__name__)
+
+
+class MirrorFileSystem(AbstractFileSystem):
+    """
+    Read-through local mirror of another fsspec filesystem. Files opened for reading are copied to
+    `directory` once and served from there while the remote ETag (or modification time) and size
+    are unchanged, revalidated with one metadata request per open. The least recently read files
+    are evicted once the mirror exceeds `max_bytes`. Everything else, including writes, goes to
+    the remote filesystem, and writes, moves and deletes drop the mirrored copy.
+
+    Registered with fsspec and universal-pathlib as the `mirror` protocol, with paths as the
+    remote filesystem sees them: `UPath("mirror://container", remote_protocol="az",
+    remote_options={...}, directory=...)` mirrors `az://container`.
+    """
+
+    protocol = "mirror"
+
+    def __init__(
+        self,
+        remote_protocol: str | None = None,
+        remote_options: dict | None = None,
+        fs: AbstractFileSystem | None = None,
+        directory=None,
+        max_bytes: int = 1024**3,
+        **kwargs,
+    ) -> None:
+        super().__init__(**kwargs)
+        if directory is None:
+            raise ValueError("MirrorFileSystem needs a local directory to mirror files into")
+        self.target = fs or fsspec.filesystem(remote_protocol, **(remote_options or {}))
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def _connect(self) -> sqlite3.Connection:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.directory / "index.sqlite", timeout=10)
+        conn.execute(
+            "create table if not exists mirror ("
+            "key text primary key, validator text not null, size integer not null, "
+            "accessed real not null)"
+        )
+        return conn
+
+    def _key(self, path: str) -> str:
+        protocol = self.target.protocol
+        protocol = protocol if isinstance(protocol, str) else protocol[0]
+        return hashlib.sha1(
+            f"{protocol}://{self.target._strip_protocol(path)}".encode()
+        ).hexdigest()
+
+    @staticmethod
+    def _validator(info: dict) -> str:
+        stamp = info.get("etag") or info.get("last_modified") or info.get("mtime")
+        return f"{stamp or info.get('created')}:{info.get('size')}"
+
+    def _open(
+        self, path, mode="rb", block_size=None, autocommit=True, cache_options=None, **kwargs
+    ):
+        if "r" not in mode:
+            self._forget(path)
+            return self.target.open(path, mode, block_size=block_size, **kwargs)
+        key = self._key(path)
+        local = self.directory / key
+        info = self.target.info(path)
+        validator = self._validator(info)
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("select validator from mirror where key = ?", (key,)).fetchone()
+            if row and row[0] == validator and local.exists():
+                conn.execute("update mirror set accessed = ? where key = ?", (time.time(), key))
+                return open(local, "rb")
+        # A temporary file per download, so concurrent fills of one file never share a partial
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".partial", delete=False) as f:
+            partial = Path(f.name)
+        try:
+            self.target.get_file(path, str(partial))
+            partial.replace(local)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "insert or replace into mirror values (?, ?, ?, ?)",
+                (key, validator, local.stat().st_size, time.time()),
+            )
+            self._evict(conn, keep=key)
+        logger.debug(f"Mirrored {path} to {local}")
+        return open(local, "rb")
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> None:
+        rows = conn.execute("select key, size from mirror order by accessed").fetchall()
+        total = sum(size for _, size in rows)
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                (self.directory / key).unlink()
+            conn.execute("delete from mirror where key = ?", (key,))
+            total -= size
+
+    def _forget(self, *paths) -> None:
+        keys = [(self._key(path),) for path in paths]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("delete from mirror where key = ?", keys)
+        for (key,) in keys:
+            with contextlib.suppress(FileNotFoundError):
+                (self.directory / key).unlink()
+
+    # Metadata and write operations go straight to the remote filesystem
+
+    def ls(self, path, detail=True, **kwargs):
+        return self.target.ls(path, detail=detail, **kwargs)
+
+    def info(self, path, **kwargs):
+        return self.target.info(path, **kwargs)
+
+    def find(self, path, maxdepth=None, withdirs=False, detail=False, **kwargs):
+        return self.target.find(path, maxdepth=maxdepth, withdirs=withdirs, detail=detail, **kwargs)
+
+    def mkdir(self, path, create_parents=True, **kwargs):
+        return self.target.mkdir(path, create_parents=create_parents, **kwargs)
+
+    def makedirs(self, path, exist_ok=False):
+        return self.target.makedirs(path, exist_ok=exist_ok)
+
+    def rmdir(self, path):
+        return self.target.rmdir(path)
+
+    def modified(self, path):
+        return self.target.modified(path)
+
+    def cp_file(self, path1, path2, **kwargs):
+        self._forget(path2)
+        return self.target.cp_file(path1, path2, **kwargs)
+
+    def mv(self, path1, path2, **kwargs):
+        self._forget(path1, path2)
+        return self.target.mv(path1, path2, **kwargs)
+
+    def rm_file(self, path):
+        self._forget(path)
+        return self.target.rm_file(path)
+
+    def rm(self, path, recursive=False, maxdepth=None):
+        paths = path if isinstance(path, list) else [path]
+        self._forget(*paths)
+        return self.target.rm(path, recursive=recursive, maxdepth=maxdepth)
+
+
+class MirrorPath(UPath):
+    """
+    Path on a `MirrorFileSystem`, such as `mirror://container/file.csv` for `az://container/file.csv`.
+    Paths joined from it keep its storage options, so they read through the same mirror.
+    """
+
+    __slots__ = ()
+
+
+fsspec.register_implementation("mirror", MirrorFileSystem, clobber=True)
+register_implementation("mirror", MirrorPath, clobber=True)
+
+
+# Partition directories are named by date, optionally hive style: 2024-05-03 or date=2024-05-03
+_PARTITION = re.compile(r"(?:(?P<key>\w+)=)?(?P<period>\d{4}-\d{2}(?:-\d{2})?)")
+
+
+def _partitions(root) -> tuple[dict, dict]:
+    """Day and month partition directories under `root`, keyed by their date string."""
+    days, months = {}, {}
+    if not root.exists():
+        return days, months
+    for directory in root.iterdir():
+        match = _PARTITION.fullmatch(directory.name)
+        if match and directory.is_dir():
+            period = match["period"]
+            (days if len(period) == 10 else months)[period] = directory
+    return days, months
+
+
+def partition_files(root, start=None, end=None, pattern: str = "*.parquet") -> list:
+    """
+    Parquet files under `root` for partitions overlapping `start` to `end` (inclusive dates or
+    timestamps, either open), pruned by directory name without opening any file.
+
+    Once a month file exists the same-named files of its days are ignored, so a reader listing
+    files while `compact_partitions` is removing them never sees the same rows twice.
+    """
+    first = None if start is None else pandas.Timestamp(start).normalize()
+    last = None if end is None else pandas.Timestamp(end).normalize()
+    days, months = _partitions(root)
+    selected, compacted = [], set()
+    for period, directory in sorted(months.items()):
+        month_start = pandas.Timestamp(f"{period}-01")
+        month_end = month_start + pandas.offsets.MonthEnd(0)
+        if (first is None or month_end >= first) and (last is None or month_start <= last):
+            paths = sorted(directory.glob(pattern))
+            selected.extend(paths)
+            compacted.update((period, path.name) for path in paths)
+    for period, directory in sorted(days.items()):
+        day = pandas.Timestamp(period)
+        if (first is None or day >= first) and (last is None or day <= last):
+            selected.extend(
+                path
+                for path in sorted(directory.glob(pattern))
+                if (period[:7], path.name) not in compacted
+            )
+    return selected
+
+
+def compact_partitions(
+    root,
+    sort_by: str | list[str] | None = None,
+    settle_days: int = 7,
+    row_group_size: int = 128 * 1024,
+    dry_run: bool = False,
+) -> dict[str, int]:
+    """Merge the daily partitions under `root` into one partition per month.
+
+    Works for any export laid out as `<root>/<YYYY-MM-DD>/<name>.parquet` (or `date=YYYY-MM-DD`),
+    such as `jira_outputs/issues`. Files with the same name are combined into
+    `<root>/<YYYY-MM>/<name>.parquet`, sorted by `sort_by` with row group statistics so readers
+    can skip row groups, and any earlier compaction of the month is folded in. Each month file is
+    written beside its final name and renamed into place before the day files are removed, and
+    `partition_files` ignores the days of a compacted month, so readers never see partial state.
+
+    Args:
+        root: Local path or datalake UPath holding the day partitions
+        sort_by: Column or columns to sort each month by (default: keep file order)
+        settle_days: Only compact months that ended at least this many days ago, so exports that
+            re-process recent days never write into a compacted month (default: 7)
+        row_group_size: Maximum rows per row group (default: 131072)
+        dry_run: If True, only log what would be compacted
+
+    Returns:
+        Number of day partitions folded into each compacted month
+    """
+    sort_by = [sort_by] if isinstance(sort_by, str) else list(sort_by or [])
+    cutoff = pandas.Timestamp.now().normalize() - pandas.Timedelta(days=settle_days)
+    days, months = _partitions(root)
+    by_month = defaultdict(list)
+    for period, directory in sorted(days.items()):
+        month = period[:7]
+        if pandas.Timestamp(f"{month}-01") + pandas.offsets.MonthEnd(0) < cutoff:
+            by_month[month].append(directory)
+
+    compacted = {}
+    for month, directories in sorted(by_month.items()):
+        key = _PARTITION.fullmatch(directories[0].name)["key"]
+        target = months.get(month) or root / (f"{key}={month}" if key else month)
+        files = defaultdict(list)
+        for directory in [target, *directories]:
+            if directory.exists():
+                for path in sorted(directory.glob("*.parquet")):
+                    files[path.name].append(path)
+        if dry_run:
+            logger.info(f"DRY RUN: Would compact {len(directories)} days into {target}")
+            continue
+        for name, paths in files.items():
+            rows = _merge_files(paths, target / name, sort_by, row_group_size)
+            logger.info(f"Compacted {len(paths)} files ({rows} rows) into {target / name}")
+        for directory in directories:
+            for paths in files.values():
+                for path in paths:
+                    if path.parent == directory:
+                        path.unlink()
+            _remove_if_empty(directory)
+        compacted[month] = len(directories)
+    return compacted
+
+
+def _read(path) -> pa.Table:
+    with path.open("rb") as stream:
+        return pq.read_table(stream)
+
+
+def _merge_files(paths: list, output, sort_by: list[str], row_group_size: int) -> int:
+    table = pa.concat_tables([_read(path) for path in paths], promote_options="default")
+    if sort_by:
+        table = table.sort_by([(column, "ascending") for column in sort_by])
+    if not str(output).startswith("az://"):
+        output.parent.mkdir(parents=True, exist_ok=True)
+    partial = output.with_name(f"{output.name}.partial")
+    try:
+        with partial.open("wb") as stream:
+            pq.write_table(table, stream, row_group_size=row_group_size, write_statistics=True)
+        partial.rename(output)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            partial.unlink()
+        raise
+    return table.num_rows
+
+
+def _remove_if_empty(directory) -> None:
+    # Datalake directories without a hierarchical namespace disappear with their last file
+    with contextlib.suppress(OSError):
+        if next(iter(directory.iterdir()), None) is None:
+            directory.rmdir()
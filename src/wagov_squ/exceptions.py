@@ -50,6 +50,12 @@ class ValidationError(SquError):
     pass
 
 
+class TransformError(SquError):
+    """Raised when the Atlaskit transformer cannot convert a document."""
+
+    pass
+
+
 class ResourceError(SquError):
     """Raised when resource management fails."""
 
@@ -7,15 +7,37 @@ __all__ = [
     "export_jira_issues",
     "flatten",
     "sentinel_beautify_local",
+    "sentinel_beautify_batch",
 ]
 
+import contextlib
+import hashlib
+import itertools
 import json
 import logging
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
 
 import pandas
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from azure.kusto.data import KustoClient, KustoConnectionStringBuilder
+from tenacity import Retrying, retry_if_exception, stop_after_attempt, wait_random_exponential
 
 from . import api, core
+from .credentials import azure_credential
+from .datalake import partition_files
+from .exceptions import TransformError
+from .scheduling import TokenBucket
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +61,9 @@ def adx_query(kql: str | list[str]):
 
     config = core.cache["config"]
     cluster, database = config.azure_dataexplorer.rsplit("/", 1)
-    client = KustoClient(KustoConnectionStringBuilder.with_az_cli_authentication(cluster))
+    client = KustoClient(
+        KustoConnectionStringBuilder.with_azure_token_credential(cluster, azure_credential)
+    )
 
     return client.execute(database, kql.replace("\\", "\\\\")).primary_results[0]
 
@@ -51,7 +75,22 @@ def adxtable2df(table) -> pandas.DataFrame:
 
 
 def export_jira_issues(
-    dry_run=False, force_refresh=False, include_today=False, days_to_export=7, batch_size=100
+    dry_run=False,
+    force_refresh=False,
+    include_today=False,
+    days_to_export=7,
+    batch_size=None,
+    max_workers=1,
+    requests_per_second=5.0,
+    shard_threshold=2000,
+    shard_workers=4,
+    incremental=False,
+    overlap_minutes=10,
+    current_state=True,
+    columns=None,
+    raw_fields=True,
+    fields=None,
+    expand=None,
 ):
     """Exports all JIRA issues to the data lake.
 
@@ -60,13 +99,55 @@ def export_jira_issues(
         force_refresh: If True, re-process existing files (useful for merging new updates)
         include_today: If True, process today's date (useful for real-time updates)
         days_to_export: Number of days to export (default: 7)
-        batch_size: Pagination batch size (default: 100)
+        batch_size: Pagination batch size (default: 100, the largest page Jira returns with
+            `fields`)
+        max_workers: Days exported concurrently (default: 1); progress is still logged day by day
+        requests_per_second: Jira request rate shared by all workers (default: 5)
+        shard_threshold: Issues in a day above which it is fetched as smaller concurrent time
+            windows (default: 2000)
+        shard_workers: Windows fetched concurrently within a heavy day (default: 4)
+        incremental: If True and a previous incremental run left a watermark in
+            `jira_outputs/issues_manifest.json`, fetch only issues updated since then and merge them
+            into their day partitions by key; otherwise export days as usual and record one. The
+            watermark is the latest `updated` stamp seen, kept with its offset and converted to the
+            Jira user's time zone for the next query
+        overlap_minutes: Minutes before the watermark to fetch again, for edits that landed while
+            the previous run was reading (default: 10)
+        current_state: If True, upsert the issues saved by this run into the latest-state table
+            `jira_outputs/issues_current/project=<KEY>/issues.parquet`, one row per issue key
+            (default: True)
+        columns: Typed columns to extract from each issue's `fields`, as a mapping of column name
+            to a dotted path (string column) or a (path, pyarrow type) pair, for example
+            {"team": ("customfield_10001.value", pa.string())}; `updated` is always included
+            (default: status, assignee, dates and other common fields)
+        raw_fields: If True, also keep the requested `fields` as a JSON string column
+            (default: True)
+        fields: Jira fields to request, as a list or comma-separated string; "*all" for every field
+            (default: only the fields read by `columns`). `updated` is always requested
+        expand: Comma-separated enhanced_jql expansions such as "changelog" (default: none)
     """
 
     logger.info(f"Starting JIRA issues export ({'DRY RUN' if dry_run else 'LIVE'})")
     logger.info(f"Exporting {days_to_export} days of data")
 
     jira_issues_path = core.datalake_path() / "jira_outputs" / "issues"
+    columns = _column_spec(columns)
+    fields = _jira_fields(columns, fields)
+    if batch_size is None:
+        batch_size = _JIRA_MAX_PAGE
+    # Settings that change what a partition holds for the same issues, so they force a rewrite
+    signature = json.dumps(
+        [
+            [(name, path, str(type)) for name, (path, type) in columns.items()],
+            raw_fields,
+            fields,
+            expand,
+        ]
+    )
+    manifest_path = jira_issues_path.parent / "issues_manifest.json"
+    current_path = jira_issues_path.parent / "issues_current"
+    saved: list = []  # day partitions written by this run
+    high_water: list = []  # latest `updated` stamp of each page fetched, as Jira sent it
     logger.info(f"Output path: {jira_issues_path}")
 
     def _get_jira_batch(page_token: str | None, jql: str) -> tuple[str | None, int, list]:
@@ -75,7 +156,15 @@ def export_jira_issues(
         logger.debug(f"Fetching batch: page_token={token_display}, limit={batch_size}")
 
         # Use enhanced_jql for Cloud with nextPageToken pagination
-        response = api.clients.jira.enhanced_jql(jql, limit=batch_size, nextPageToken=page_token)
+        response = _jira_call(
+            api.clients.jira.enhanced_jql,
+            jql,
+            fields=fields,
+            expand=expand,
+            limit=batch_size,
+            nextPageToken=page_token,
+            requests_per_second=requests_per_second,
+        )
 
         if not response or not isinstance(response, dict):
             raise ValueError(f"Invalid Jira response: {type(response)}")
@@ -99,27 +188,90 @@ def export_jira_issues(
         )
         return next_page_token, total, issues
 
-    def _save_parquet(df: pandas.DataFrame, output_path) -> None:
-        """Save DataFrame to parquet, handling both local and blob storage."""
-        if str(output_path).startswith("az://"):
-            # Blob storage - use UPath write_bytes to maintain auth context
-            import io
-
-            with io.BytesIO() as buffer:
-                df.to_parquet(buffer, coerce_timestamps="ms", allow_truncated_timestamps=True)
-                buffer.seek(0)
-                output_path.write_bytes(buffer.read())
+    def _fetch_pages(jql: str, first: tuple, log, label: str) -> Iterator[list]:
+        """Yield the pages of `jql`, starting with its already fetched `first` page."""
+        page_token, _, batch = first
+        batch_count = 1
+        loaded = 0
+        log.info(
+            f"Batch 1: next_page_token: {'<token>' if page_token else 'None'}, got {len(batch)} issues"
+        )
+        if page_token:
+            log.info(f"Fetching issues for {label} in {batch_size}-issue batches...")
         else:
-            # Local storage - create directory if needed
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            df.to_parquet(output_path)
+            log.info(f"Found {len(batch)} total issues for {label}")
+        while True:
+            loaded += len(batch)
+            if batch:
+                yield batch
+            if page_token is None:
+                break
+            # Safety: stop if a single window runs away; heavy windows are split before this
+            if batch_count > 500:
+                log.error(
+                    f"Too many batches ({batch_count}) for {label}, stopping to prevent runaway"
+                )
+                break
+            page_token, _, batch = _get_jira_batch(page_token, jql)
+            batch_count += 1
+            if batch_count % 20 == 0:
+                token_display = "<token>" if page_token else "None"
+                log.info(
+                    f"Batch {batch_count}: next_page_token: {token_display}, got {len(batch)} issues"
+                )
+            if batch_count % 3 == 0:
+                log.info(f"Progress: {loaded + len(batch)} issues loaded for {label}...")
+
+    def _window_pages(start: pandas.Timestamp, end: pandas.Timestamp, log) -> Iterator[list]:
+        """
+        Yield pages of issues updated in [start, end). A window with more than `shard_threshold`
+        issues is split into hour, then 15, 5 and 1 minute windows fetched concurrently, keeping
+        the first copy of any issue that moved between windows while they were fetched.
+        """
+        jql = _window_jql(start, end)
+        if end - start == pandas.Timedelta(days=1):
+            label = str(start.date())
+        elif start.date() == (end - pandas.Timedelta(minutes=1)).date():
+            label = f"{start:%H:%M}-{end:%H:%M} on {start.date()}"
+        else:
+            label = f"{start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M}"
+        first = _get_jira_batch(None, jql)
+        minutes = (end - start) / pandas.Timedelta(minutes=1)
+        if first[0] is None or minutes <= 1 or not _is_heavy(jql, log):
+            yield from _fetch_pages(jql, first, log, label)
+            return
+
+        step = next(size for size in (60, 15, 5, 1) if size < minutes)
+        edges = list(pandas.date_range(start, end, freq=f"{step}min"))
+        if edges[-1] != end:  # windows that are not whole steps end in a shorter one
+            edges.append(end)
+        windows = [_window_pages(*window, log) for window in zip(edges, edges[1:])]
+        log.info(f"Splitting {label} into {len(windows)} windows of {step} minutes")
+        seen: set[str] = set()
+        for page in _background_pages(windows, shard_workers):
+            page = [issue for issue in page if issue["key"] not in seen]
+            seen.update(issue["key"] for issue in page)
+            if page:
+                yield page
+
+    def _is_heavy(jql: str, log) -> bool:
+        """Ask Jira for an approximate count; assume heavy if it can't say."""
+        try:
+            response = _jira_call(
+                api.clients.jira.approximate_issue_count,
+                jql,
+                requests_per_second=requests_per_second,
+            )
+            count = response["count"]
+        except Exception as e:
+            log.info(f"Approximate count unavailable ({e}), splitting window")
+            return True
+        return count > shard_threshold
 
-    def _export_day(date: pandas.Timestamp) -> pandas.DataFrame | None:
-        """Export Jira issues for a single day."""
-        logger.info(f"Processing {date.date()}")
+    def _export_day(date: pandas.Timestamp, log=logger) -> int | None:
+        """Export Jira issues for a single day, logging progress to `log`."""
+        log.info(f"Processing {date.date()}")
 
-        next_date = date + pandas.Timedelta(days=1)
-        jql = f"updated >= {date.date()} and updated < {next_date.date()} order by key"
         output = jira_issues_path / f"{date.date()}" / "issues.parquet"
 
         # Determine if we should skip this date
@@ -127,100 +279,629 @@ def export_jira_issues(
 
         # Skip today unless specifically requested
         if is_today and not include_today:
-            logger.info(f" Skipping {date.date()} (today) - use include_today=True to process")
+            log.info(f" Skipping {date.date()} (today) - use include_today=True to process")
             return None
 
         # Skip if file exists and we're not forcing refresh
         if not dry_run and output.exists() and not force_refresh and not is_today:
-            logger.info(
+            log.info(
                 f" Skipping {date.date()} - already exists (use force_refresh=True to re-process)"
             )
             return None
 
-        # Collect all pages
-        dataframes = []
-        page_token = None
-        total = -1
+        # Days folded into a monthly partition by compact_partitions stay there
+        if (jira_issues_path / f"{date:%Y-%m}" / output.name).exists():
+            log.info(f" Skipping {date.date()} - compacted into {date:%Y-%m}")
+            return None
 
-        batch_count = 0
-        while True:
-            batch_count += 1
-            page_token, total, issues = _get_jira_batch(page_token, jql)
+        # Stream pages into the partition, fetching the next page while the last is written
+        day_start = pandas.Timestamp(date.date())
+        windows = [_window_pages(day_start, day_start + pandas.Timedelta(days=1), log)]
+        pages = _high_water(_background_pages(windows, workers=1), high_water)
+        if dry_run:
+            count = sum(len(page) for page in pages)
+        else:
+            count, changed = _write_issues(pages, output, columns, raw_fields, signature)
+            if changed:
+                saved.append(output)
+            elif count:
+                log.info(f"Unchanged {count} issues in {output}, kept the existing file")
+                return count
+
+        if not count:
+            log.info(f"No issues found for {date.date()}")
+            return None
 
-            # Log progress every 20 batches instead of every batch
-            if batch_count == 1 or batch_count % 20 == 0:
-                token_display = "<token>" if page_token else "None"
-                logger.info(
-                    f"Batch {batch_count}: next_page_token: {token_display}, got {len(issues)} issues"
+        if not dry_run:
+            log.info(f"Saved {count} issues to {output}")
+        else:
+            log.info(f"DRY RUN: Would save {count} issues")
+
+        return count
+
+    def _update_current_state(tables: Iterable[pa.Table]) -> None:
+        """Upsert issues into the latest-state table, seeding it from every day on first use."""
+        if not current_path.exists():
+            logger.info(f"Building {current_path} from all day partitions")
+            tables = (_read_table(path) for path in partition_files(jira_issues_path))
+        for project, rows in _upsert_current(tables, current_path).items():
+            logger.info(f"Updated {rows} issues in {current_path / f'project={project}'}")
+
+    def _export_delta(watermark: pandas.Timestamp) -> None:
+        """Merge issues updated since `watermark` into their day partitions and advance it."""
+        timezone = _jira_timezone(requests_per_second)
+        overlap = pandas.Timedelta(minutes=overlap_minutes)
+        start = (_jira_local(watermark, timezone) - overlap).floor("min")
+        end = pandas.Timestamp.now(tz=timezone).tz_localize(None).ceil("min")
+        logger.info(f"Fetching issues updated from {start} to {end} ({timezone})")
+        by_day: dict[str, dict[str, dict]] = {}
+        pages = _background_pages([_window_pages(start, end, logger)], workers=1)
+        for page in _high_water(pages, high_water):
+            for issue in page:
+                updated = (issue.get("fields") or {}).get("updated") or str(end)
+                by_day.setdefault(updated[:10], {})[issue["key"]] = issue
+
+        for day, issues in sorted(by_day.items()):
+            output = jira_issues_path / day / "issues.parquet"
+            # A day folded into its monthly partition is merged there, where readers look for it
+            month = jira_issues_path / day[:7] / output.name
+            compacted = month.exists()
+            if compacted:
+                output = month
+            if dry_run:
+                logger.info(f"DRY RUN: Would merge {len(issues)} issues into {output}")
+            else:
+                rows, changed = _merge_issues(
+                    list(issues.values()),
+                    output,
+                    columns,
+                    raw_fields,
+                    signature,
+                    day=(day, timezone) if compacted else None,
                 )
-
-            if issues:
-                dataframes.append(pandas.DataFrame(issues))
-            if len(dataframes) == 1:  # Log after first batch
-                if total > batch_size and total != 999999:  # Known total with multiple pages
-                    logger.info(
-                        f"Found {total} total issues for {date.date()} (fetching in {batch_size}-issue batches)"
-                    )
-                elif total == 999999:  # Paginated API without known total
-                    logger.info(
-                        f"Fetching issues for {date.date()} in {batch_size}-issue batches..."
-                    )
-                else:
-                    logger.info(f"Found {total} total issues for {date.date()}")
-            elif len(dataframes) > 1 and len(dataframes) % 3 == 0:  # Progress every 3 batches
-                loaded = sum(len(df) for df in dataframes)
-                if total != 999999:
-                    logger.info(f"Progress: {loaded} / {total} issues loaded...")
+                if changed:
+                    logger.info(f"Merged {len(issues)} issues into {output} ({rows} in partition)")
                 else:
-                    logger.info(f"Progress: {loaded} issues loaded (total unknown)...")
-
-            # Stop when no more pages available
-            if page_token is None:
-                break
-
-            # Additional safety: stop if we've done too many batches
-            if batch_count > 500:  # More than 25,000 issues seems unlikely
-                logger.error(f"Too many batches ({batch_count}), stopping to prevent runaway")
-                break
-
-        if not dataframes:
-            logger.info(f"No issues found for {date.date()}")
-            return None
-
-        # Combine and save
-        df = pandas.concat(dataframes, ignore_index=True)
-        df["fields"] = df["fields"].apply(json.dumps)
-
-        logger.info(f"Processing {len(df)} issues for {date.date()}")
+                    logger.info(f"Unchanged {output}, {len(issues)} issues already up to date")
 
+        total = sum(len(issues) for issues in by_day.values())
+        if current_state and not dry_run and by_day:
+            delta = [issue for issues in by_day.values() for issue in issues.values()]
+            _update_current_state([_issues_table(delta, columns=columns, raw_fields=raw_fields)])
         if not dry_run:
-            _save_parquet(df, output)
-            logger.info(f"Saved {len(df)} issues to {output}")
-        else:
-            logger.info(f"DRY RUN: Would save {len(df)} issues")
+            latest = max(high_water, default=watermark)
+            _write_manifest(
+                manifest_path,
+                {
+                    "watermark": str(latest),
+                    "fetched_from": str(start),
+                    "fetched_to": str(end),
+                    "timezone": str(timezone),
+                    "issues": total,
+                },
+            )
+        logger.info(f"Incremental export complete! Merged {total} issues into {len(by_day)} days")
 
-        return df
+    watermark = _read_manifest(manifest_path).get("watermark") if incremental else None
+    if watermark:
+        _export_delta(pandas.Timestamp(watermark))
+        return
 
     # Export last 7 days
     start_date = pandas.Timestamp.now() - pandas.Timedelta(days=days_to_export)
     end_date = pandas.Timestamp.now()
+    dates = []
     current_date = start_date
+    while current_date <= end_date:
+        dates.append(current_date)
+        current_date += pandas.Timedelta(days=1)
 
     total_issues = 0
     days_processed = 0
 
     logger.info(f"Processing dates from {start_date.date()} to {end_date.date()}")
 
-    while current_date <= end_date:
-        df = _export_day(current_date)
-        if df is not None:
-            total_issues += len(df)
+    if max_workers <= 1:
+        results = (_export_day(date) for date in dates)
+    else:
+
+        def _export_day_deferred(date):
+            log = _DeferredLog()
+            try:
+                return _export_day(date, log), log
+            except Exception as e:
+                log.failure = e  # raised once this day's progress has been replayed
+                return None, log
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jira-export")
+        futures = [executor.submit(_export_day_deferred, date) for date in dates]
+        results = _replay_in_order(futures, executor)
+
+    for count in results:
+        total_issues += count or 0
         days_processed += 1
-        current_date += pandas.Timedelta(days=1)
 
     logger.info(
         f"Export complete! Processed {days_processed} days with {total_issues} total issues"
     )
+    if current_state and not dry_run and (saved or not current_path.exists()):
+        _update_current_state(_read_table(path) for path in saved)
+    if incremental and not dry_run:
+        # Days skipped as already exported still bound the watermark through their stored stamps
+        latest = max(high_water, default=None)
+        if latest is None:
+            latest = _partition_high_water(partition_files(jira_issues_path, start_date, end_date))
+        if latest is None:
+            logger.info("No issues exported, so no watermark was recorded")
+        else:
+            _write_manifest(manifest_path, {"watermark": str(latest), "issues": total_issues})
+            logger.info(f"Recorded watermark {latest} in {manifest_path}")
+
+
+class _DeferredLog:
+    """Collects one day's progress messages on a worker thread for replay in day order."""
+
+    def __init__(self) -> None:
+        self.records: list[tuple[int, str]] = []
+        self.failure: Exception | None = None
+
+    def info(self, message: str) -> None:
+        self.records.append((logging.INFO, message))
+
+    def error(self, message: str) -> None:
+        self.records.append((logging.ERROR, message))
+
+    def replay(self) -> None:
+        for level, message in self.records:
+            logger.log(level, message)
+        self.records.clear()
+
+
+def _replay_in_order(futures: list, executor: ThreadPoolExecutor):
+    """Yield day results in submission order, logging each day's messages as it is reached."""
+    try:
+        for future in futures:
+            count, log = future.result()
+            log.replay()
+            if log.failure is not None:
+                raise log.failure
+            yield count
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def _window_jql(start: pandas.Timestamp, end: pandas.Timestamp) -> str:
+    """JQL for issues updated in [start, end), whole days by date and shorter windows by minute."""
+    if end - start == pandas.Timedelta(days=1) and start == start.normalize():
+        return f"updated >= {start.date()} and updated < {end.date()} order by key"
+    return f'updated >= "{start:%Y-%m-%d %H:%M}" and updated < "{end:%Y-%m-%d %H:%M}" order by key'
+
+
+def _high_water(pages: Iterable[list], marks: list) -> Iterator[list]:
+    """Pass `pages` through, appending the latest `fields.updated` of each page to `marks`."""
+    for page in pages:
+        stamps = [
+            pandas.Timestamp(updated)
+            for issue in page
+            if (updated := (issue.get("fields") or {}).get("updated"))
+        ]
+        if stamps:
+            marks.append(max(stamps))
+        yield page
+
+
+def _partition_high_water(paths: list) -> pandas.Timestamp | None:
+    """The latest `updated` stamp stored in the partition files at `paths`."""
+    latest = _latest_by_key(_read_table(path).to_pandas() for path in paths)
+    if latest is None or latest["updated"].isna().all():
+        return None
+    return latest["updated"].max()
+
+
+def _jira_timezone(requests_per_second: float = 5.0):
+    """The Jira user's time zone, which JQL reads dates and times in."""
+    profile = _jira_call(api.clients.jira.myself, requests_per_second=requests_per_second)
+    return (profile or {}).get("timeZone") or "UTC"
+
+
+def _jira_local(stamp: pandas.Timestamp, timezone) -> pandas.Timestamp:
+    """`stamp` as the wall-clock time JQL means in `timezone`; naive stamps are already."""
+    if stamp.tzinfo is None:
+        return stamp
+    return stamp.tz_convert(timezone).tz_localize(None)
+
+
+def _background_pages(sources: list[Iterator], workers: int) -> Iterator:
+    """
+    Drain `sources` on up to `workers` background threads and yield their items as they arrive.
+    At most one item per worker waits in the queue, so each source runs one page ahead of the
+    consumer. Errors in a source are raised in the consumer.
+    """
+    pending: queue.Queue = queue.Queue(maxsize=workers)
+    stopped = threading.Event()
+
+    def put(item) -> None:
+        while not stopped.is_set():
+            try:
+                pending.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def drain(source: Iterator) -> None:
+        try:
+            for item in source:
+                if stopped.is_set():
+                    return
+                put((item, None))
+        except Exception as e:
+            put((None, e))
+        put((_DONE, None))
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jira-pages")
+    futures = [executor.submit(drain, source) for source in sources]
+    try:
+        finished = 0
+        while finished < len(futures):
+            item, error = pending.get()
+            if error is not None:
+                raise error
+            if item is _DONE:
+                finished += 1
+            else:
+                yield item
+    finally:
+        stopped.set()
+        executor.shutdown(cancel_futures=True)
+
+
+_DONE = object()
+
+
+# Typed columns pulled out of each issue's `fields`: column name -> (dotted path, arrow type)
+_JIRA_COLUMNS = {
+    "summary": ("summary", pa.string()),
+    "status": ("status.name", pa.string()),
+    "status_category": ("status.statusCategory.key", pa.string()),
+    "issuetype": ("issuetype.name", pa.string()),
+    "priority": ("priority.name", pa.string()),
+    "project": ("project.key", pa.string()),
+    "assignee": ("assignee.displayName", pa.string()),
+    "reporter": ("reporter.displayName", pa.string()),
+    "resolution": ("resolution.name", pa.string()),
+    "labels": ("labels", pa.list_(pa.string())),
+    "created": ("created", pa.timestamp("us", tz="UTC")),
+    "updated": ("updated", pa.timestamp("us", tz="UTC")),
+    "resolutiondate": ("resolutiondate", pa.timestamp("us", tz="UTC")),
+}
+
+
+def _column_spec(columns: dict | None) -> dict[str, tuple[str, pa.DataType]]:
+    """Normalise a `columns` mapping of name -> path or (path, type); `updated` is always kept."""
+    spec = dict(_JIRA_COLUMNS if columns is None else columns)
+    spec.setdefault("updated", _JIRA_COLUMNS["updated"])
+    return {
+        name: (column, pa.string()) if isinstance(column, str) else tuple(column)
+        for name, column in spec.items()
+    }
+
+
+def _jira_fields(
+    columns: dict[str, tuple[str, pa.DataType]], fields: str | list[str] | None = None
+) -> list[str]:
+    """
+    The Jira fields to request: `fields` if given, else those that hold `columns`. `updated` is
+    added unless every field is requested, since partitions and the watermark are keyed on it.
+    """
+    if fields is None:
+        names = [path.split(".")[0] for path, _ in columns.values()]
+    else:
+        names = [
+            name.strip() for name in (fields.split(",") if isinstance(fields, str) else fields)
+        ]
+    if "*all" not in names:
+        names.append("updated")
+    return list(dict.fromkeys(names))
+
+
+# enhanced_jql pages are capped at 100 issues once any field besides id and key is requested,
+# which `updated` always is
+_JIRA_MAX_PAGE = 100
+
+
+def _field(fields, path: str):
+    for part in path.split("."):
+        if not isinstance(fields, dict):
+            return None
+        fields = fields.get(part)
+    return fields
+
+
+def _field_array(values: list, type: pa.DataType) -> pa.Array:
+    if pa.types.is_timestamp(type):
+        values = pandas.to_datetime(pandas.Series(values, dtype=object), utc=True, format="ISO8601")
+    elif pa.types.is_string(type):  # objects and lists mapped to a string column keep their JSON
+        values = [_as_text(value) for value in values]
+    return pa.array(values, type=type, from_pandas=True)
+
+
+def _as_text(value) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    return json.dumps(value) if isinstance(value, dict | list) else str(value)
+
+
+def _issues_table(
+    issues: list[dict],
+    schema: pa.Schema | None = None,
+    columns: dict | None = None,
+    raw_fields: bool = True,
+) -> pa.Table:
+    """
+    One page of issues as an arrow table: the top-level issue keys, a typed column for each of
+    `columns` (see `_column_spec`) and, if `raw_fields`, the whole of `fields` as a JSON string.
+    Expanded objects such as `changelog` and `renderedFields` are JSON strings too.
+    """
+    df = pandas.DataFrame(issues)
+    fields = df.pop("fields").tolist() if "fields" in df else [{}] * len(df)
+    fields = [f if isinstance(f, dict) else {} for f in fields]  # issues without fields are NaN
+    for name in df.columns:
+        # Expansions such as changelog are kept as JSON like `fields`, since their nested types
+        # vary from page to page (a page without histories would type them as null)
+        if df[name].map(lambda value: isinstance(value, dict | list)).any():
+            df[name] = df[name].map(_as_text)
+    if raw_fields:
+        df["fields"] = [json.dumps(f) for f in fields]
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for name, (path, type) in _column_spec(columns).items():
+        array = _field_array([_field(f, path) for f in fields], type)
+        table = table.append_column(pa.field(name, type), array)
+    if schema is None:
+        # Columns empty on the first page would otherwise be typed null for the whole file
+        return table.cast(
+            pa.schema(
+                pa.field(f.name, pa.string()) if pa.types.is_null(f.type) else f
+                for f in table.schema
+            )
+        )
+    return pa.table(
+        [
+            table[f.name].cast(f.type)
+            if f.name in table.column_names
+            else pa.nulls(len(table), f.type)
+            for f in schema
+        ],
+        schema=schema,
+    )
+
+
+def _write_issues(
+    pages: Iterable[list[dict]],
+    output,
+    columns: dict | None = None,
+    raw_fields: bool = True,
+    signature: str | None = None,
+) -> tuple[int, bool]:
+    """Write pages of issues to `output` as parquet row groups, one page in memory at a time."""
+
+    def tables():
+        schema = None
+        for page in pages:
+            table = _issues_table(page, schema, columns, raw_fields)
+            schema = table.schema
+            yield table
+
+    return _write_tables(tables(), output, signature)
+
+
+_FINGERPRINT = b"wagov_squ.fingerprint"
+
+
+def _write_tables(
+    tables: Iterable[pa.Table], output, signature: str | None = None
+) -> tuple[int, bool]:
+    """Write arrow tables with a shared schema to `output`, one row group each.
+
+    The file is written to a `.partial` sibling and renamed into place once complete, so an
+    interrupted export never leaves a truncated partition that later runs would skip. On the
+    datalake the write is a streamed block upload rather than a buffered copy of the file.
+
+    With a `signature`, a fingerprint of the issue keys and `updated` stamps plus the signature is
+    stored in the file metadata, and an existing file with the same fingerprint is left as it is.
+    Datalake files are then staged in a local temporary file, so unchanged partitions are never
+    uploaded.
+
+    Args:
+        tables: Arrow tables, read lazily
+        output: Local path or datalake UPath of the partition file
+        signature: Export settings that change the file contents; None skips fingerprinting
+
+    Returns:
+        Number of rows and whether `output` was written; nothing is written for no tables
+    """
+    tables = iter(tables)
+    first = next(tables, None)
+    if first is None:
+        return 0, False
+    remote = str(output).startswith("az://")
+    if not remote:
+        output.parent.mkdir(parents=True, exist_ok=True)
+    partial = output.with_name(f"{output.name}.partial")
+    rows = 0
+    stamps: list[str] = []
+    with contextlib.ExitStack() as stack:
+        staged = partial
+        if remote and signature is not None:
+            staged = Path(stack.enter_context(tempfile.TemporaryDirectory())) / output.name
+        try:
+            with staged.open("wb") as stream:
+                with pq.ParquetWriter(stream, first.schema) as writer:
+                    for table in itertools.chain([first], tables):
+                        writer.write_table(table)
+                        rows += table.num_rows
+                        if signature is not None:
+                            stamps.extend(_stamps(table))
+                    if signature is not None:
+                        fingerprint = _fingerprint(stamps, signature)
+                        writer.add_key_value_metadata({_FINGERPRINT: fingerprint})
+            if signature is not None and fingerprint == _stored_fingerprint(output):
+                staged.unlink()
+                return rows, False
+            if staged != partial:
+                with staged.open("rb") as source, partial.open("wb") as target:
+                    shutil.copyfileobj(source, target)
+            partial.rename(output)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                partial.unlink()
+            raise
+    return rows, True
+
+
+def _stamps(table: pa.Table) -> list[str]:
+    updated = table["updated"] if "updated" in table.column_names else pa.nulls(len(table))
+    return [f"{key}\t{stamp}" for key, stamp in zip(table["key"].to_pylist(), updated.to_pylist())]
+
+
+def _fingerprint(stamps: list[str], signature: str) -> str:
+    """Order-independent digest of a partition's issue keys and `updated` stamps."""
+    digest = hashlib.sha256(signature.encode())
+    for stamp in sorted(stamps):
+        digest.update(f"\n{stamp}".encode())
+    return digest.hexdigest()
+
+
+def _stored_fingerprint(output) -> str | None:
+    try:
+        with output.open("rb") as stream:
+            metadata = pq.read_metadata(stream).metadata or {}
+    except (OSError, pa.ArrowException):  # missing or unreadable; rewrite it
+        return None
+    return metadata.get(_FINGERPRINT, b"").decode() or None
+
+
+def _merge_issues(
+    issues: list[dict],
+    output,
+    columns: dict | None = None,
+    raw_fields: bool = True,
+    signature: str | None = None,
+    day: tuple[str, str] | None = None,
+) -> tuple[int, bool]:
+    """
+    Upsert `issues` into the partition at `output` by key, returning the partition's rows. For a
+    monthly partition, `day` is the (YYYY-MM-DD, Jira time zone) the issues were updated on, and
+    only that day's rows are replaced, so each issue keeps its state on the month's other days.
+    """
+    table = _issues_table(issues, columns=columns, raw_fields=raw_fields)
+    if output.exists():
+        existing = _read_table(output)
+        stale = pc.is_in(existing["key"], value_set=table["key"])
+        if day is not None:
+            date, timezone = day
+            stale = pc.and_kleene(stale, pc.equal(_partition_days(existing, timezone), date))
+        kept = existing.filter(pc.invert(stale.fill_null(False)))
+        table = pa.concat_tables([kept, table], promote_options="default")
+    return _write_tables([table], output, signature)
+
+
+def _partition_days(table: pa.Table, timezone: str) -> pa.Array:
+    """The day in Jira's `timezone` each issue in `table` was updated on, as YYYY-MM-DD."""
+    if "updated" in table.column_names:
+        local = table["updated"].cast(pa.timestamp("us", tz=timezone))
+        return pc.strftime(local, format="%Y-%m-%d")
+    # Partitions from before typed columns only hold `updated` in the `fields` JSON
+    stamps = [
+        (json.loads(f or "{}").get("updated") or "")[:10] for f in table["fields"].to_pylist()
+    ]
+    return pa.array(stamps, pa.string())
+
+
+def _read_table(path) -> pa.Table:
+    with path.open("rb") as stream:
+        return pq.read_table(stream)
+
+
+def _latest_by_key(frames: Iterable[pandas.DataFrame]) -> pandas.DataFrame | None:
+    """Combine issue frames one at a time, keeping the row with the latest `fields.updated` per key."""
+    latest = None
+    for df in frames:
+        if "updated" not in df:
+            updated = df["fields"].map(lambda fields: json.loads(fields).get("updated"))
+            df = df.assign(updated=pandas.to_datetime(updated, utc=True, format="ISO8601"))
+        latest = df if latest is None else pandas.concat([latest, df], ignore_index=True)
+        latest = latest.sort_values("updated", kind="stable", na_position="first")
+        latest = latest.drop_duplicates("key", keep="last")
+    return None if latest is None else latest.sort_values("key", ignore_index=True)
+
+
+def _upsert_current(tables: Iterable[pa.Table], current_path) -> dict[str, int]:
+    """
+    Merge issue tables into the latest-state table under `current_path`, hive partitioned by
+    project key so readers can prune on `project`. Returns issues written per project.
+    """
+    issues = _latest_by_key(table.to_pandas() for table in tables)
+    if issues is None:
+        return {}
+    projects = issues["key"].str.rsplit("-", n=1).str[0]
+    written = {}
+    for project, rows in issues.groupby(projects):
+        output = current_path / f"project={project}" / "issues.parquet"
+        merged = [rows]
+        if output.exists():
+            merged.insert(0, _read_table(output).to_pandas())
+        table = pa.Table.from_pandas(_latest_by_key(merged), preserve_index=False)
+        _write_tables([table], output)
+        written[project] = len(rows)
+    return written
+
+
+def _read_manifest(path) -> dict:
+    """Return the export manifest at `path`, or an empty one before the first incremental run."""
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())
+
+
+def _write_manifest(path, manifest: dict) -> None:
+    partial = path.with_name(f"{path.name}.partial")
+    partial.write_text(json.dumps(manifest, indent=2))
+    partial.rename(path)
+
+
+_jira_bucket = TokenBucket()
+
+
+def _is_rate_limited(error: BaseException) -> bool:
+    return getattr(getattr(error, "response", None), "status_code", None) == 429
+
+
+def _retry_after(retry_state) -> float:
+    """Wait as long as Jira's Retry-After header asks, or back off exponentially without one."""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    try:
+        return float(response.headers["Retry-After"])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return wait_random_exponential(max=60)(retry_state)
+
+
+def _jira_call(method, *args, requests_per_second: float = 5.0, **kwargs):
+    """Call a Jira client method through the shared rate limiter, retrying 429 responses."""
+    for attempt in Retrying(
+        retry=retry_if_exception(_is_rate_limited),
+        wait=_retry_after,
+        stop=stop_after_attempt(6),
+        before_sleep=lambda state: logger.warning(
+            f"Jira rate limit hit, retrying in {state.next_action.sleep:.0f}s"
+        ),
+        reraise=True,
+    ):
+        with attempt:
+            while wait := _jira_bucket.try_acquire(
+                1, requests_per_second, requests_per_second, "jira"
+            ):
+                time.sleep(wait)
+            return method(*args, **kwargs)
 
 
 def flatten(nested_dict: dict, parent_key: str = "", sep: str = "_") -> dict:
@@ -247,6 +928,11 @@ def flatten(nested_dict: dict, parent_key: str = "", sep: str = "_") -> dict:
     return result
 
 
+_JSON_FIELDS = ["Labels", "Owner", "AdditionalData", "Comments"]
+_MAX_ALERTS = 10
+_MAX_WIKI_LENGTH = 32760
+
+
 def sentinel_beautify_local(
     data: dict,
     outputformat: str = "jira",
@@ -254,17 +940,80 @@ def sentinel_beautify_local(
     default_orgid: int = 2,
 ):
     """Convert SecurityIncident to markdown and structured data for JIRA."""
-    max_alerts = 10
-    max_wiki_length = 32760
-
     # Parse JSON fields
-    for field in ["Labels", "Owner", "AdditionalData", "Comments"]:
+    for field in _JSON_FIELDS:
         if data.get(field) and isinstance(data[field], str):
             data[field] = json.loads(data[field])
 
+    payload, mdtext = _incident_markdown(data)
+
+    # Get customer info
+    customer = _get_customer_info(data["TenantId"], default_status, default_orgid)
+
+    return {
+        **payload,
+        "wikimarkup": api.atlaskit_transformer(mdtext)[:_MAX_WIKI_LENGTH],
+        **customer,
+    }
+
+
+def sentinel_beautify_batch(
+    incidents: pandas.DataFrame,
+    outputformat: str = "jira",
+    default_status: str = "Onboard: MOU (T0)",
+    default_orgid: int = 2,
+    workers: int = 1,
+) -> list[dict]:
+    """Convert a DataFrame of SecurityIncidents to JIRA payloads in one pass.
+
+    Produces the same payloads as `sentinel_beautify_local` row by row, but parses JSON columns
+    once per column, looks customers up from one workspace listing, and renders all incidents in
+    a single `atlaskit_transformer` batch spread across `workers` transformer processes.
+
+    Args:
+        incidents: Output of `api.security_incidents()`, optionally with an `AlertData` column
+        outputformat: Output format, kept for parity with `sentinel_beautify_local`
+        default_status: SecOps status for tenants without a workspace record
+        default_orgid: Jira organisation id for tenants without a workspace record
+        workers: Transformer processes for incidents outside the in-process markdown subset
+
+    Returns:
+        One payload dict per incident, in DataFrame order
+    """
+    if incidents.empty:
+        return []
+    frame = incidents.astype(object).where(incidents.notna(), None)
+    for field in _JSON_FIELDS:
+        if field in frame:
+            frame[field] = frame[field].map(
+                lambda value: json.loads(value) if value and isinstance(value, str) else value
+            )
+    records = frame.to_dict("records")
+    customers = _customer_index()
+    rendered = [_incident_markdown(record) for record in records]
+    wikis = api.atlaskit_transformer([mdtext for _, mdtext in rendered], workers=workers)
+
+    results = []
+    for record, (payload, mdtext), wiki in zip(records, rendered, wikis):
+        if isinstance(wiki, TransformError):
+            logger.warning(f"Incident {record['IncidentNumber']}: {wiki}, using markdown")
+            wiki = mdtext
+        customer = customers.get(record["TenantId"], {})
+        results.append(
+            {
+                **payload,
+                "wikimarkup": wiki[:_MAX_WIKI_LENGTH],
+                **_customer_fields(customer, default_status, default_orgid),
+            }
+        )
+    return results
+
+
+def _incident_markdown(data: dict) -> tuple[dict, str]:
+    """Build the JIRA payload fields and markdown body for an incident with parsed JSON fields."""
     labels, incident_details = _extract_incident_info(data)
-    comments = _extract_comments(data.get("Comments", []))
-    alert_details, observables = _process_alerts(data.get("AlertData", [])[:max_alerts])
+    comments = _extract_comments(data.get("Comments") or [])
+    alert_details, observables = _process_alerts((data.get("AlertData") or [])[:_MAX_ALERTS])
 
     title = f"SIEM Detection #{data['IncidentNumber']} Sev:{data['Severity']} - {data['Title']} (Status:{data['Status']})"
 
@@ -283,17 +1032,13 @@ def sentinel_beautify_local(
     # Clean and deduplicate labels
     clean_labels = set("".join(c for c in label if c.isalnum() or c in ".:_") for label in labels)
 
-    # Get customer info
-    customer = _get_customer_info(data["TenantId"], default_status, default_orgid)
-
-    return {
+    payload = {
         "subject": title,
         "labels": list(clean_labels),
         "observables": [dict(ts) for ts in set(tuple(i.items()) for i in observables)],
         "sentinel_data": data,
-        "wikimarkup": api.atlaskit_transformer(mdtext)[:max_wiki_length],
-        **customer,
     }
+    return payload, mdtext
 
 
 def _extract_incident_info(data: dict) -> tuple[list[str], list[str]]:
@@ -469,17 +1214,33 @@ def _format_alert_field(details: list, field: str, value) -> None:
 
 def _get_customer_info(tenant_id: str, default_status: str, default_orgid: int) -> dict:
     """Get customer information from tenant ID."""
-    workspaces_df = api.list_workspaces()
-    customer = {}
+    customer = _customer_index().get(tenant_id, {})
+    return _customer_fields(customer, default_status, default_orgid)
+
+
+def _customer_index() -> Mapping[str, Mapping]:
+    """Read-only map of tenant ID to its first workspace record.
 
-    filtered_df = workspaces_df[workspaces_df["customerId"] == tenant_id]
+    Built once from `api.list_workspaces()` and kept for as long as the workspace list file it was
+    built from, identified by its modification time, so lookups are a dictionary access instead of
+    a parquet read and scan and never serve records older than the list.
+    """
+    listing = api.list_workspaces_safe()  # rebuilds the list file once its cache expires
+    stamp = os.stat(listing).st_mtime_ns
+    cached = core.cache.get("customer_index")
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    records = api.list_workspaces().to_dict("records")
+    index = MappingProxyType(
+        {record["customerId"]: MappingProxyType(record) for record in reversed(records)}
+    )
+    core.cache.set("customer_index", (stamp, index))
+    return index
 
-    if not filtered_df.empty:
-        customer_records = filtered_df.to_dict("records")
-        customer = customer_records[0]
 
+def _customer_fields(customer: Mapping, default_status: str, default_orgid: int) -> dict:
     return {
         "secops_status": customer.get("SecOps Status", default_status),
         "jira_orgid": customer.get("JiraOrgId", default_orgid),
-        "customer": customer,
+        "customer": dict(customer),
     }
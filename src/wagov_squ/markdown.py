@@ -0,0 +1,207 @@
+"""In-process markdown rendering for the subset used by incident tickets."""
+
+__all__ = ["parse_subset", "to_wiki", "to_adf", "fast_transform", "fast_transform_many"]
+
+import json
+import re
+
+# Blocks are ("heading", level, inlines), ("paragraph", inlines), ("bullets", [inlines, ...]) and
+# ("code", language, text). Inlines are [(text, mark)] with mark None, "strong" or ("link", href).
+
+_HEADING = re.compile(r"(#{1,6}) (\S.*)")
+_BULLET = re.compile(r"([-*]) (\S.*)")
+_FENCE = re.compile(r"```([a-z0-9]*)")
+_INLINE = re.compile(
+    r"(?:(?<=\s)|^)\*\*(?P<strong>\S[^*]*?(?<=\S))\*\*(?=[\s.,:;]|$)"
+    r"|\[(?P<text>[^\[\]]+)\]\((?P<href>https?://[A-Za-z0-9\-._~:/?#@!$&'*+,;=%]+)\)"
+)
+_SAFE_TEXT = re.compile(r"[A-Za-z0-9 .,:;'\"/()=%@$#&?-]*")
+# Sequences either syntax would reinterpret: markdown entities, autolinked addresses, wiki dashes,
+# citations and emoticons. A lone " - " is plain text in both.
+_UNSAFE = re.compile(
+    r"&#?\w+;|://|www\.|@|[A-Za-z0-9]\.[A-Za-z]{2,}|--|\?\?|(?:^|\s)-(?! )|(?<! )-(?:\s|$)"
+    r"|[:;]-?[()PDp](?![A-Za-z0-9])|\([^\s()]{1,3}\)"
+)
+# Starts of a block that would read as another block type in markdown or wiki markup
+_BLOCK_START = re.compile(r"[#>+\-=|]|\d+[.)]|h[1-6]\.|bq\.")
+
+
+def _safe(text: str) -> bool:
+    return bool(_SAFE_TEXT.fullmatch(text)) and not _UNSAFE.search(text)
+
+
+def _inlines(text: str) -> list | None:
+    """Split `text` into marked runs, or return None if it uses anything outside the subset."""
+    if text != text.strip() or _BLOCK_START.match(text):
+        return None
+    runs, position = [], 0
+    for match in _INLINE.finditer(text):
+        runs.append((text[position : match.start()], None))
+        if match["strong"] is not None:
+            runs.append((match["strong"], "strong"))
+        else:
+            if match["text"] != match["text"].strip():
+                return None
+            runs.append((match["text"], ("link", match["href"])))
+        position = match.end()
+    runs.append((text[position:], None))
+    if not all(_safe(run) for run, _ in runs):
+        return None
+    return [(run, mark) for run, mark in runs if run]
+
+
+def parse_subset(text: str, inlines=_inlines) -> list | None:
+    """
+    Parse markdown made of single-line headings and paragraphs, flat bullet lists, bold, links and
+    fenced code. Returns None for anything else, so callers can hand it to the full transformer.
+    `inlines` splits the text of each line into marked runs (see `_inlines`).
+    """
+    lines = re.split(r"\r?\n|\r", text)
+    blocks: list = []
+    previous = None  # kind of the block the last non-blank line belonged to
+    blank = True
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        index += 1
+        if not line:
+            blank = True
+            continue
+        if line != line.rstrip() or line[0] in " \t":
+            return None
+        if fence := _FENCE.fullmatch(line):
+            try:
+                end = lines.index("```", index)
+            except ValueError:
+                return None
+            code = "\n".join(lines[index:end])
+            if "{code" in code or "```" in code:
+                return None
+            blocks.append(("code", fence[1] or None, code))
+            index, previous, blank = end + 1, "code", False
+            continue
+        if heading := _HEADING.fullmatch(line):
+            if heading[2].endswith("#") or (runs := inlines(heading[2])) is None:
+                return None
+            blocks.append(("heading", len(heading[1]), runs))
+            previous = "heading"
+        elif bullet := _BULLET.fullmatch(line):
+            if (runs := inlines(bullet[2])) is None:
+                return None
+            if previous == bullet[1]:  # same list, tight or loose
+                blocks[-1][1].append(runs)
+            elif previous in ("-", "*"):
+                return None  # a change of marker starts a new list; leave that to the parser
+            else:
+                blocks.append(("bullets", [runs]))
+            previous = bullet[1]
+        else:
+            if not blank and previous not in ("heading", "code"):
+                return None  # paragraph continuation or lazy list continuation
+            if (runs := inlines(line)) is None:
+                return None
+            blocks.append(("paragraph", runs))
+            previous = "paragraph"
+        blank = False
+    return blocks
+
+
+def _wiki_inlines(runs: list) -> str:
+    parts = []
+    for text, mark in runs:
+        if mark == "strong":
+            parts.append(f"*{text}*")
+        elif mark:
+            parts.append(f"[{text}|{mark[1]}]")
+        else:
+            parts.append(text)
+    return "".join(parts)
+
+
+def to_wiki(blocks: list) -> str:
+    """Render parsed blocks as Jira wiki markup."""
+    rendered = []
+    for block in blocks:
+        if block[0] == "heading":
+            rendered.append(f"h{block[1]}. {_wiki_inlines(block[2])}")
+        elif block[0] == "paragraph":
+            rendered.append(_wiki_inlines(block[1]))
+        elif block[0] == "bullets":
+            rendered.append("\n".join(f"* {_wiki_inlines(item)}" for item in block[1]))
+        else:
+            language = f":{block[1]}" if block[1] else ""
+            rendered.append(f"{{code{language}}}{block[2]}{{code}}")
+    return "\n\n".join(rendered)
+
+
+def _adf_inlines(runs: list) -> list[dict]:
+    nodes = []
+    for text, mark in runs:
+        node: dict = {"type": "text"}
+        if mark == "strong":
+            node["marks"] = [{"type": "strong"}]
+        elif mark:
+            node["marks"] = [{"type": "link", "attrs": {"href": mark[1]}}]
+        node["text"] = text
+        nodes.append(node)
+    return nodes
+
+
+def to_adf(blocks: list) -> dict:
+    """Render parsed blocks as an Atlassian Document Format document."""
+    content = []
+    for block in blocks:
+        if block[0] == "heading":
+            node = {"type": "heading", "attrs": {"level": block[1]}}
+            node["content"] = _adf_inlines(block[2])
+        elif block[0] == "paragraph":
+            node = {"type": "paragraph", "content": _adf_inlines(block[1])}
+        elif block[0] == "bullets":
+            items = [
+                {"type": "listItem", "content": [{"type": "paragraph", "content": _adf_inlines(i)}]}
+                for i in block[1]
+            ]
+            node = {"type": "bulletList", "content": items}
+        else:
+            node = {"type": "codeBlock", "attrs": {"language": block[1]}}
+            if block[2]:
+                node["content"] = [{"type": "text", "text": block[2]}]
+        content.append(node)
+    return {"version": 1, "type": "doc", "content": content}
+
+
+def fast_transform(inputtext: str, inputfmt: str = "md", outputfmt: str = "wiki") -> str | None:
+    """
+    Convert markdown to wiki markup or ADF in-process, with the same trailing newline as the node
+    transformer. Returns None when the input or formats are outside the supported subset.
+    """
+    if inputfmt != "md" or outputfmt not in ("wiki", "adf"):
+        return None
+    return _render(parse_subset(inputtext), outputfmt)
+
+
+def fast_transform_many(
+    texts: list[str], inputfmt: str = "md", outputfmt: str = "wiki"
+) -> list[str | None]:
+    """
+    `fast_transform` for a batch of documents. Lines repeated across the batch, such as alert names
+    and field labels in incident tickets, are split into runs once.
+    """
+    if inputfmt != "md" or outputfmt not in ("wiki", "adf"):
+        return [None] * len(texts)
+    runs: dict[str, list | None] = {}
+
+    def inlines(text: str) -> list | None:
+        if text not in runs:
+            runs[text] = _inlines(text)
+        return runs[text]
+
+    return [_render(parse_subset(text, inlines), outputfmt) for text in texts]
+
+
+def _render(blocks: list | None, outputfmt: str) -> str | None:
+    if blocks is None:
+        return None
+    if outputfmt == "wiki":
+        return to_wiki(blocks) + "\n"
+    return json.dumps(to_adf(blocks), ensure_ascii=False, separators=(",", ":")) + "\n"
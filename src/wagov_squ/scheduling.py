@@ -0,0 +1,215 @@
+"""Scheduling helpers for spreading Log Analytics work across workspaces."""
+
+__all__ = [
+    "WorkspaceStats",
+    "workspace_stats",
+    "TokenBucket",
+    "HostTokenBucket",
+    "BatchScheduler",
+    "loganalytics_scheduler",
+]
+
+import heapq
+import itertools
+import logging
+import math
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import closing
+from pathlib import Path
+
+from .core import dirs
+
+logger = logging.getLogger(__name__)
+
+
+class WorkspaceStats:
+    """
+    Per-workspace query latency and row counts, kept as moving averages in a small sqlite file.
+    Failures to read or write the store are logged and otherwise ignored.
+    """
+
+    def __init__(self, path: Path, alpha: float = 0.3) -> None:
+        self.path = Path(path)
+        self.alpha = alpha  # weight of the newest sample in the moving averages
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute(
+            "create table if not exists workspace_stats ("
+            "workspace text primary key, latency real not null, rows real not null, "
+            "samples integer not null, updated real not null)"
+        )
+        return conn
+
+    def record(self, samples: Iterable[tuple[str, float, int]]) -> None:
+        """Fold `(workspace, latency_seconds, row_count)` samples into the stored averages."""
+        now = time.time()
+        rows = [(workspace, latency, count, now) for workspace, latency, count in samples]
+        if not rows:
+            return
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany(
+                    "insert into workspace_stats values (?, ?, ?, 1, ?) "
+                    "on conflict(workspace) do update set "
+                    f"latency = latency + {self.alpha} * (excluded.latency - latency), "
+                    f"rows = rows + {self.alpha} * (excluded.rows - rows), "
+                    "samples = samples + 1, updated = excluded.updated",
+                    rows,
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.debug(f"Could not record workspace stats in {self.path}: {e}")
+
+    def expected(self) -> dict[str, tuple[float, float]]:
+        """Return `{workspace: (latency_seconds, rows)}` for every workspace seen so far."""
+        try:
+            with closing(self._connect()) as conn, conn:
+                rows = conn.execute("select workspace, latency, rows from workspace_stats")
+                return {workspace: (latency, count) for workspace, latency, count in rows}
+        except (sqlite3.Error, OSError) as e:
+            logger.debug(f"Could not read workspace stats from {self.path}: {e}")
+            return {}
+
+    def order(self, workspaces: Iterable[str]) -> list[str]:
+        """
+        Sort `workspaces` longest-expected-first. Workspaces without history are treated as the
+        slowest, so an unknown large tenant is never left for the final batch.
+        """
+        expected = self.expected()
+        slowest = max(expected.values(), default=(0.0, 0.0))
+        return sorted(workspaces, key=lambda ws: expected.get(ws, slowest), reverse=True)
+
+
+workspace_stats = WorkspaceStats(Path(dirs.user_cache_dir) / "loganalytics_stats.sqlite")
+
+
+class TokenBucket:
+    """Process-local token bucket: `burst` queries may start at once, refilled at `rate` per second."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: dict[str, tuple[float, float]] = {}  # name -> (tokens, updated)
+
+    def try_acquire(self, cost: float, rate: float, burst: float, name: str = "default") -> float:
+        """Take `cost` tokens if available and return 0, otherwise return the seconds to wait."""
+        if math.isinf(rate):
+            return 0.0
+        with self._lock:
+            now = time.time()
+            tokens, wait = _take(*self._state.get(name, (burst, now)), now, cost, rate, burst)
+            self._state[name] = (tokens, now)
+            return wait
+
+
+class HostTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process on this host through a sqlite file, so concurrent
+    notebooks, dbt threads and processes split one request budget. Falls back to process-local
+    pacing if the file can't be used.
+    """
+
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+        self.path = Path(path)
+
+    def try_acquire(self, cost: float, rate: float, burst: float, name: str = "default") -> float:
+        if math.isinf(rate):
+            return 0.0
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=10, isolation_level=None)) as conn:
+                conn.execute(
+                    "create table if not exists buckets "
+                    "(name text primary key, tokens real not null, updated real not null)"
+                )
+                conn.execute("begin immediate")  # serialise read-modify-write across processes
+                now = time.time()
+                row = conn.execute(
+                    "select tokens, updated from buckets where name = ?", (name,)
+                ).fetchone()
+                tokens, wait = _take(*(row or (burst, now)), now, cost, rate, burst)
+                conn.execute("insert or replace into buckets values (?, ?, ?)", (name, tokens, now))
+                conn.execute("commit")
+                return wait
+        except (sqlite3.Error, OSError) as e:
+            logger.debug(f"Host rate coordination unavailable ({e}), pacing within this process")
+            return super().try_acquire(cost, rate, burst, name)
+
+
+def _take(
+    tokens: float, updated: float, now: float, cost: float, rate: float, burst: float
+) -> tuple[float, float]:
+    """Refill a bucket up to `now` and take `cost` tokens. Returns (tokens left, seconds to wait)."""
+    tokens = min(burst, tokens + max(now - updated, 0.0) * rate)
+    cost = min(cost, burst)
+    if tokens >= cost:
+        return tokens - cost, 0.0
+    return tokens, (cost - tokens) / rate
+
+
+class BatchScheduler:
+    """
+    Gate for Log Analytics batches. Waiting batches are granted turns by weighted fair queuing across
+    priority classes, and turns are paced by a token bucket (by default shared across the host), so
+    interactive work can overtake queued bulk batches without exceeding the shared service limits.
+    """
+
+    def __init__(self, weights: dict[str, float], pacer: TokenBucket | None = None) -> None:
+        self.weights = weights
+        self.pacer = pacer or TokenBucket()
+        self._cond = threading.Condition()
+        self._waiting: list[tuple[float, int]] = []  # heap of (virtual finish, ticket number)
+        self._finish = dict.fromkeys(weights, 0.0)  # latest virtual finish per priority class
+        self._virtual = 0.0  # virtual finish of the most recently granted batch
+        self._tickets = itertools.count()
+
+    def acquire(
+        self,
+        priority: str = "interactive",
+        cost: float = 1.0,
+        rate: float = math.inf,
+        burst: float = 1.0,
+        timeout: float | None = None,
+        name: str = "default",
+    ) -> bool:
+        """
+        Wait for a turn to start a batch of `cost` queries, with the `name` bucket refilling at `rate`
+        queries per second up to `burst`. Returns False if `timeout` seconds pass first.
+        """
+        if priority not in self.weights:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {list(self.weights)}")
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            start = max(self._virtual, self._finish[priority])
+            ticket = (start + cost / self.weights[priority], next(self._tickets))
+            self._finish[priority] = ticket[0]
+            heapq.heappush(self._waiting, ticket)
+            while True:
+                wait = 1.0
+                if self._waiting[0] == ticket:
+                    wait = self.pacer.try_acquire(cost, rate, burst, name)
+                    if wait == 0:
+                        break
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    return False
+                if deadline is not None:
+                    wait = min(wait, deadline - now)
+                self._cond.wait(max(wait, 0.01))
+            heapq.heappop(self._waiting)
+            self._virtual = ticket[0]
+            self._cond.notify_all()
+            return True
+
+
+loganalytics_scheduler = BatchScheduler(
+    {"interactive": 8.0, "bulk": 1.0},
+    HostTokenBucket(Path(dirs.user_cache_dir) / "loganalytics_rate.sqlite"),
+)
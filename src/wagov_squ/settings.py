@@ -4,10 +4,10 @@ from __future__ import annotations
 
 import re
 import warnings
-from typing import Any
+from typing import Any, Literal
 from urllib.parse import urlparse
 
-from pydantic import ConfigDict, Field, computed_field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, computed_field, field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -81,6 +81,19 @@ class JiraConfig(BaseSettings):
         return f"{self.url}/rest/api/3"
 
 
+class CredentialConfig(BaseModel):
+    """A service principal or managed identity that Log Analytics queries can run as."""
+
+    name: str = Field(..., description="Unique name for this identity, used for its rate state")
+    tenant_id: str | None = Field(None, description="Tenant ID for a service principal")
+    client_id: str | None = Field(
+        None, description="Service principal or user-assigned managed identity client ID"
+    )
+    client_secret: str | None = Field(
+        None, description="Service principal secret (omit to use a managed identity)"
+    )
+
+
 class SquSettings(BaseSettings):
     """Pydantic settings with Azure Key Vault and environment variable support."""
 
@@ -133,6 +146,15 @@ class SquSettings(BaseSettings):
         None, description="Tenable.io secret key for vulnerability data"
     )
 
+    # Log Analytics identities
+    loganalytics_credentials: list[CredentialConfig] = Field(
+        default_factory=list,
+        description="Identities to spread Log Analytics queries across (default: Azure CLI login)",
+    )
+    loganalytics_credential_strategy: Literal["round_robin", "least_loaded"] = Field(
+        "least_loaded", description="How queries are spread across loganalytics_credentials"
+    )
+
     @field_validator(
         "runzero_apitoken", "abuseipdb_api_key", "tenable_access_key", "tenable_secret_key"
     )
@@ -0,0 +1,271 @@
+"""Long-lived workers for the bundled Atlaskit document transformer."""
+
+__all__ = [
+    "atlaskit_bundle",
+    "atlaskit_snapshot",
+    "build_atlaskit_snapshot",
+    "TransformerWorker",
+    "TransformerPool",
+    "transformer_pool",
+]
+
+import atexit
+import hashlib
+import itertools
+import json
+import logging
+import math
+import os
+import pkgutil
+import queue
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import version
+from pathlib import Path
+from subprocess import PIPE, Popen, run
+
+from .core import dirs
+from .exceptions import TransformError
+
+logger = logging.getLogger(__name__)
+
+
+def atlaskit_bundle() -> Path:
+    """Return the transformer bundle, copied once per package version into the user cache."""
+    transformer = dirs.user_cache_path / f"atlaskit-transformer.bundle_v{version('wagov_squ')}.js"
+    if not transformer.exists():
+        bundle_data = pkgutil.get_data("wagov_squ", "atlaskit-transformer.bundle.js")
+        if bundle_data is None:
+            raise FileNotFoundError("atlaskit-transformer.bundle.js not found in wagov_squ package")
+        transformer.parent.mkdir(parents=True, exist_ok=True)
+        partial = transformer.with_name(f"{transformer.name}.{os.getpid()}.tmp")
+        partial.write_bytes(bundle_data)
+        partial.replace(transformer)  # concurrent processes never run a half-written bundle
+    return transformer
+
+
+def atlaskit_snapshot(runtime: str = "node") -> Path:
+    """
+    Path of the V8 startup snapshot for the cached bundle. Snapshots only load in the node binary
+    that built them, so the name includes the bundle version and a fingerprint of `runtime`.
+    """
+    executable = shutil.which(runtime) or runtime
+    stat = os.stat(executable)
+    fingerprint = hashlib.sha1(
+        f"{os.path.realpath(executable)}:{stat.st_size}:{stat.st_mtime_ns}".encode()
+    ).hexdigest()[:12]
+    return atlaskit_bundle().with_suffix(f".{fingerprint}.blob")
+
+
+def build_atlaskit_snapshot(runtime: str = "node") -> Path:
+    """
+    Build a startup snapshot of the bundle with its transformers already initialised, so new
+    workers skip parsing and setting up the Atlaskit editor code. Used by `transformer_pool` when
+    present; `just snapshot` builds it.
+    """
+    snapshot = atlaskit_snapshot(runtime)
+    partial = snapshot.with_name(f"{snapshot.name}.{os.getpid()}.tmp")
+    run(
+        [runtime, "--snapshot-blob", str(partial), "--build-snapshot", str(atlaskit_bundle())],
+        check=True,
+    )
+    partial.replace(snapshot)
+    return snapshot
+
+
+class TransformerWorker:
+    """
+    A `<runtime> atlaskit-transformer.js --server` process speaking line-delimited JSON over
+    stdin/stdout. Started on first use and restarted if it exits.
+    """
+
+    def __init__(self, command: list[str]) -> None:
+        self.command = command
+        self.process: Popen | None = None
+        self._ids = itertools.count()
+
+    def _ensure_started(self) -> Popen:
+        if self.process is None or self.process.poll() is not None:
+            if self.process is not None:
+                logger.warning(f"Transformer worker exited ({self.process.returncode}), restarting")
+            logger.debug(" ".join(self.command + ["--server"]))
+            # node >= 22.1 keeps compiled bundle code here between runs; older versions ignore it
+            compile_cache = str(dirs.user_cache_path / "node-compile-cache")
+            self.process = Popen(
+                self.command + ["--server"],
+                stdin=PIPE,
+                stdout=PIPE,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                env={"NODE_COMPILE_CACHE": compile_cache} | dict(os.environ),
+            )
+        return self.process
+
+    def _exchange(self, requests: list[dict]) -> dict[int, dict]:
+        """Send `requests` and collect responses by id, stopping early if the worker's output ends."""
+        process = self._ensure_started()
+        assert process.stdin is not None and process.stdout is not None
+        writer = None
+        if len(requests) == 1:
+            self._write(process, requests)
+        else:  # write from a thread so a full stdout pipe can't deadlock a large batch
+            writer = threading.Thread(target=self._write, args=(process, requests), daemon=True)
+            writer.start()
+        responses = {}
+        for _ in requests:
+            line = process.stdout.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            responses[response.get("id")] = response
+        if writer is not None:
+            writer.join()
+        return responses
+
+    @staticmethod
+    def _write(process: Popen, requests: list[dict]) -> None:
+        assert process.stdin is not None
+        try:
+            for request in requests:
+                process.stdin.write(json.dumps(request) + "\n")
+            process.stdin.flush()
+        except (BrokenPipeError, ValueError):
+            pass  # the worker died; the reader sees its output end
+
+    def _request(self, inputtext: str, inputfmt: str, outputfmt: str) -> dict:
+        return {"id": next(self._ids), "input": inputtext, "from": inputfmt, "to": outputfmt}
+
+    def transform(self, inputtext: str, inputfmt: str = "md", outputfmt: str = "wiki") -> str:
+        request = self._request(inputtext, inputfmt, outputfmt)
+        for attempt in range(2):
+            try:
+                response = self._exchange([request]).get(request["id"])
+            except (OSError, ValueError) as e:
+                logger.warning(f"Transformer worker failed ({e})")
+                response = None
+            if response is not None:
+                break
+            self.close()
+            if attempt == 0:
+                logger.warning("Retrying with a fresh transformer worker")
+        else:
+            raise BrokenPipeError("transformer worker exited before answering")
+        if "error" in response:
+            raise TransformError(f"Atlaskit transform failed: {response['error']}")
+        return response["output"]
+
+    def transform_many(
+        self, texts: list[str], inputfmt: str = "md", outputfmt: str = "wiki"
+    ) -> list[str | TransformError]:
+        """
+        Convert `texts` in one pipelined exchange with the worker. A document that fails is returned
+        as a TransformError in its place; documents lost to a worker crash are retried one by one.
+        """
+        requests = [self._request(text, inputfmt, outputfmt) for text in texts]
+        try:
+            responses = self._exchange(requests)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Transformer worker failed mid-batch ({e})")
+            responses = {}
+        if len(responses) < len(requests):
+            self.close()
+        results: list[str | TransformError] = []
+        for request in requests:
+            response = responses.get(request["id"])
+            if response is None:
+                try:
+                    results.append(self.transform(request["input"], inputfmt, outputfmt))
+                except TransformError as e:
+                    results.append(e)
+                except (OSError, ValueError) as e:
+                    results.append(TransformError(f"Atlaskit transform failed: {e}"))
+            elif "error" in response:
+                results.append(TransformError(f"Atlaskit transform failed: {response['error']}"))
+            else:
+                results.append(response["output"])
+        return results
+
+    def close(self) -> None:
+        if self.process is not None:
+            try:
+                if self.process.stdin:
+                    self.process.stdin.close()
+            except OSError:
+                pass  # unflushed requests to a worker that already exited
+            try:
+                self.process.wait(timeout=5)
+            except Exception:
+                self.process.kill()
+            self.process = None
+
+
+class TransformerPool:
+    """A fixed number of transformer workers shared between threads."""
+
+    def __init__(self, command: list[str], size: int = 1) -> None:
+        self.workers = [TransformerWorker(command) for _ in range(size)]
+        self._idle: queue.Queue[TransformerWorker] = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+
+    def transform(self, inputtext: str, inputfmt: str = "md", outputfmt: str = "wiki") -> str:
+        worker = self._idle.get()
+        try:
+            return worker.transform(inputtext, inputfmt, outputfmt)
+        finally:
+            self._idle.put(worker)
+
+    def transform_many(
+        self, texts: list[str], inputfmt: str = "md", outputfmt: str = "wiki"
+    ) -> list[str | TransformError]:
+        """Split `texts` into one contiguous batch per worker and convert the batches in parallel."""
+        if not texts:
+            return []
+        size = math.ceil(len(texts) / len(self.workers))
+        parts = [texts[i : i + size] for i in range(0, len(texts), size)]
+
+        def run(part: list[str]) -> list[str | TransformError]:
+            worker = self._idle.get()
+            try:
+                return worker.transform_many(part, inputfmt, outputfmt)
+            finally:
+                self._idle.put(worker)
+
+        with ThreadPoolExecutor(max_workers=len(parts)) as executor:
+            return [result for part in executor.map(run, parts) for result in part]
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.close()
+
+
+_pools: dict[tuple, TransformerPool] = {}
+_pools_lock = threading.Lock()
+
+
+def transformer_pool(runtime: str = "node", size: int = 1) -> TransformerPool:
+    """
+    Return the process-wide worker pool for `runtime`, creating it on first use. Workers start from
+    the bundle's startup snapshot if one has been built for this runtime.
+    """
+    try:
+        snapshot = atlaskit_snapshot(runtime)
+    except OSError:  # runtime not found; let the worker report it
+        snapshot = None
+    if snapshot is not None and snapshot.exists():
+        command = [runtime, "--snapshot-blob", str(snapshot), "--"]
+    else:
+        command = [runtime, str(atlaskit_bundle())]
+    key = (*command, size)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = TransformerPool(command, size)
+        return _pools[key]
+
+
+@atexit.register
+def _close_pools() -> None:
+    for pool in _pools.values():
+        pool.close()
@@ -82,3 +82,358 @@ def test_fmt_enum_import():
     assert Fmt.json == "json"
     assert Fmt.list == "list"
     assert Fmt.ibis == "ibis"
+
+
+def _fake_result(workspace, status=None):
+    """Build a minimal stand-in for a Log Analytics batch result."""
+    from types import SimpleNamespace
+
+    from azure.monitor.query import LogsQueryStatus
+
+    table = SimpleNamespace(rows=[[workspace]], columns=["Workspace"])
+    return SimpleNamespace(
+        status=status or LogsQueryStatus.SUCCESS,
+        tables=[table],
+        partial_data=[table],
+        statistics={"query": {"executionTime": 0.5}},
+    )
+
+
+def _patch_loganalytics(query_batch, stats_path):
+    """Patch workspace listing and the Log Analytics client used by loganalytics_query."""
+    import pandas as pd
+
+    from wagov_squ.credentials import CredentialPool, PooledClient
+    from wagov_squ.scheduling import WorkspaceStats
+
+    workspaces = pd.DataFrame({"customerId": ["ws-a", "ws-b"], "alias": ["A", "B"]})
+    client = Mock()
+    client.query_batch.side_effect = query_batch
+    pool = CredentialPool([PooledClient("test", None, client)])
+    return (
+        patch("wagov_squ.api.credential_pool", return_value=pool),
+        patch("wagov_squ.api.list_workspaces", return_value=workspaces),
+        patch("wagov_squ.api.list_securityinsights", return_value=workspaces),
+        patch("wagov_squ.api.workspace_stats", WorkspaceStats(stats_path)),
+    ), client
+
+
+def test_loganalytics_query_deadline_returns_partial_results(tmp_path):
+    """Batches still running at the deadline are reported instead of awaited."""
+    import time
+    from contextlib import ExitStack
+
+    from wagov_squ.api import loganalytics_query
+
+    def query_batch(requests):
+        if requests[0].workspace == "ws-b":
+            time.sleep(2)
+        return [_fake_result(request.workspace) for request in requests]
+
+    patches, _ = _patch_loganalytics(query_batch, tmp_path / "stats.sqlite")
+    with ExitStack() as stack:
+        for p in patches:
+            stack.enter_context(p)
+        results = loganalytics_query(["T"], batch_size=1, batch_delay=0, deadline=0.5)
+
+    df = results["T"]
+    assert list(df["TenantId"]) == ["ws-a"]
+    assert df.attrs["unfinished_workspaces"] == ["ws-b"]
+
+
+def test_query_all_reports_unfinished_for_any_format():
+    """Workspaces past the deadline are returned alongside formats that cannot carry attrs."""
+    import pandas as pd
+
+    from wagov_squ.api import query_all
+
+    results = {}
+    for query, workspace, unfinished in [("A", "ws-a", ["ws-c"]), ("B", "ws-b", ["ws-b"])]:
+        results[query] = pd.DataFrame({"TenantId": [workspace]})
+        results[query].attrs["unfinished_workspaces"] = unfinished
+    with patch("wagov_squ.api.loganalytics_query", return_value=results) as run:
+        records, unfinished = query_all(["A", "B"], fmt="json", deadline=1, return_unfinished=True)
+        assert query_all(["A", "B"], deadline=1).attrs["unfinished_workspaces"] == unfinished
+
+    assert run.call_args.kwargs["deadline"] == 1
+    assert [record["TenantId"] for record in records] == ["ws-a", "ws-b"]
+    assert unfinished == ["ws-b", "ws-c"]
+
+
+def test_loganalytics_query_hedges_outliers(tmp_path):
+    """Queries cut off at their hedge threshold are re-issued with the full timeout."""
+    from contextlib import ExitStack
+
+    from azure.monitor.query import LogsQueryError
+
+    from wagov_squ import api
+
+    calls = []
+
+    def query_batch(requests):
+        calls.append([request.headers["Prefer"] for request in requests])
+        if len(calls) == 1:
+            return [
+                _fake_result(r.workspace)
+                if r.workspace == "ws-a"
+                else LogsQueryError(code="GatewayTimeout", message="Gateway timeout")
+                for r in requests
+            ]
+        return [_fake_result(request.workspace) for request in requests]
+
+    history = api.defaultdict(api.deque, {("T", "ws-a"): [1.0] * 5, ("T", "ws-b"): [3.0] * 5})
+    patches, _ = _patch_loganalytics(query_batch, tmp_path / "stats.sqlite")
+    with ExitStack() as stack, patch.object(api, "_latencies", history):
+        for p in patches:
+            stack.enter_context(p)
+        results = api.loganalytics_query(["T"], batch_delay=0, hedge_percentile=0.9)
+
+    assert sorted(calls[0]) == ["wait=1,include-statistics=true", "wait=3,include-statistics=true"]
+    assert calls[1] == ["include-statistics=true"]
+    assert sorted(results["T"]["Workspace"]) == ["ws-a", "ws-b"]
+    assert results["T"].attrs["unfinished_workspaces"] == []
+
+
+def test_loganalytics_query_hedges_only_known_queries_and_timeouts(tmp_path):
+    """Queries without their own history run uncut, and query errors are not re-issued."""
+    from contextlib import ExitStack
+
+    from azure.monitor.query import LogsQueryError
+
+    from wagov_squ import api
+
+    calls = []
+
+    def query_batch(requests):
+        calls.append({request.workspace: request.headers["Prefer"] for request in requests})
+        return [
+            LogsQueryError(code="BadArgumentError", message="Syntax error")
+            if r.workspace == "ws-a"
+            else _fake_result(r.workspace)
+            for r in requests
+        ]
+
+    history = api.defaultdict(api.deque, {("T", "ws-a"): [1.0] * 5, ("other", "ws-b"): [1.0] * 5})
+    patches, _ = _patch_loganalytics(query_batch, tmp_path / "stats.sqlite")
+    with ExitStack() as stack, patch.object(api, "_latencies", history):
+        for p in patches:
+            stack.enter_context(p)
+        results = api.loganalytics_query(["T"], batch_delay=0, hedge_percentile=0.9)
+
+    assert calls == [{"ws-a": "wait=1,include-statistics=true", "ws-b": "include-statistics=true"}]
+    assert "BadArgumentError" in set(results["T"]["code"].dropna())
+
+
+def test_loganalytics_query_schedules_slowest_workspaces_first(tmp_path):
+    """Workspaces with the highest recorded latency are sent in the first batch."""
+    from contextlib import ExitStack
+
+    from wagov_squ.api import loganalytics_query
+    from wagov_squ.scheduling import WorkspaceStats
+
+    stats = WorkspaceStats(tmp_path / "stats.sqlite")
+    stats.record([("ws-a", 1.0, 10), ("ws-b", 30.0, 10)])
+    batches = []
+
+    def query_batch(requests):
+        batches.append([request.workspace for request in requests])
+        return [_fake_result(request.workspace) for request in requests]
+
+    patches, _ = _patch_loganalytics(query_batch, tmp_path / "stats.sqlite")
+    with ExitStack() as stack:
+        for p in patches:
+            stack.enter_context(p)
+        results = loganalytics_query(["T"], batch_size=1, batch_delay=0)
+
+    assert batches == [["ws-b"], ["ws-a"]]
+    assert list(results["T"]["TenantId"]) == ["ws-a", "ws-b"]  # output keeps workspace order
+
+
+def test_jira_issues_prunes_partitions(tmp_path):
+    """Test that jira_issues reads only partitions in range, projected and filtered on updated."""
+    from wagov_squ.api import jira_issues
+    from wagov_squ.legacy import _write_issues
+
+    root = tmp_path / "jira_outputs/issues"
+    for day, hours in {"2024-05-01": [1, 23], "2024-05-02": [4], "2024-06-01": [2]}.items():
+        page = [
+            {
+                "key": f"SQU-{day[5:7]}{day[8:]}{hour}",
+                "fields": {
+                    "updated": f"{day}T{hour:02d}:00:00.000+0000",
+                    "status": {"name": "Done"},
+                },
+            }
+            for hour in hours
+        ]
+        _write_issues([page], root / day / "issues.parquet")
+    (root / "2024-03-01").mkdir()
+    (root / "2024-03-01/issues.parquet").write_bytes(b"not parquet")  # outside every range below
+
+    with patch("wagov_squ.api.datalake_path", return_value=tmp_path):
+        issues = jira_issues("2024-05-01 02:00", "2024-06-01", columns=["key", "status"])
+        assert list(issues.columns) == ["key", "status"]
+        assert sorted(issues["key"]) == ["SQU-050123", "SQU-05024"]
+
+        expr = jira_issues(start="2024-05-02", fmt="ibis")
+        assert sorted(expr.to_pandas()["key"]) == ["SQU-05024", "SQU-06012"]
+        assert jira_issues("2025-01-01", "2025-02-01", columns=["key"]).empty
+
+
+def test_jira_issues_reads_baseline_partitions(tmp_path):
+    """Test that partitions with only the `fields` JSON are filtered on its `updated` stamp."""
+    import json
+
+    import pandas
+
+    from wagov_squ.api import jira_issues
+    from wagov_squ.legacy import _write_issues
+
+    root = tmp_path / "jira_outputs/issues"
+    for day, hours in {"2024-05-01": [1, 23], "2024-05-02": [4]}.items():
+        (root / day).mkdir(parents=True)
+        pandas.DataFrame(
+            {
+                "key": [f"OLD-{day[8:]}{hour}" for hour in hours],
+                "fields": [
+                    json.dumps({"updated": f"{day}T{hour:02d}:00:00.000+0000"}) for hour in hours
+                ],
+            }
+        ).to_parquet(root / day / "issues.parquet")
+    page = [{"key": "NEW-1", "fields": {"updated": "2024-05-03T05:00:00.000+0000"}}]
+    _write_issues([page], root / "2024-05-03" / "issues.parquet")
+
+    with patch("wagov_squ.api.datalake_path", return_value=tmp_path):
+        assert list(jira_issues("2024-05-01", "2024-05-01 12:00")["key"]) == ["OLD-011"]  # old only
+        assert sorted(jira_issues("2024-05-01 02:00", "2024-05-02 05:00")["key"]) == [
+            "OLD-0123",
+            "OLD-024",
+        ]
+        issues = jira_issues("2024-05-01 02:00", "2024-05-04", columns=["key", "updated"])
+        assert sorted(issues["key"]) == ["NEW-1", "OLD-0123", "OLD-024"]
+        assert issues["updated"].notna().all()
+
+
+def test_jira_issues_pushes_updated_filter_to_typed_partitions(tmp_path):
+    """Test that only baseline partitions read the `fields` JSON; typed scans filter on `updated`."""
+    import json
+
+    import ibis
+    import pandas
+
+    from wagov_squ.api import jira_issues
+    from wagov_squ.legacy import _write_issues
+
+    root = tmp_path / "jira_outputs/issues"
+    (root / "2024-05-01").mkdir(parents=True)
+    pandas.DataFrame(
+        {"key": ["OLD-1"], "fields": [json.dumps({"updated": "2024-05-01T01:00:00.000+0000"})]}
+    ).to_parquet(root / "2024-05-01/issues.parquet")
+    page = [
+        {"key": f"NEW-{hour}", "fields": {"updated": f"2024-05-02T{hour:02d}:00:00.000+0000"}}
+        for hour in (1, 5, 9)
+    ]
+    _write_issues([page], root / "2024-05-02" / "issues.parquet")
+
+    with patch("wagov_squ.api.datalake_path", return_value=tmp_path):
+        expr = jira_issues("2024-05-01", "2024-05-02 06:00", columns=["key"], fmt="ibis")
+        assert sorted(expr.to_pandas()["key"]) == ["NEW-1", "NEW-5", "OLD-1"]
+        con = expr._find_backend().con
+        [(_, plan)] = con.sql(f"EXPLAIN (FORMAT json) {ibis.to_sql(expr)}").fetchall()
+
+    def scans(node):
+        if node["name"] == "READ_PARQUET":
+            yield node["extra_info"]
+        for child in node["children"]:
+            yield from scans(child)
+
+    baseline, typed = sorted(
+        scans(json.loads(plan)[0]), key=lambda scan: "fields" in scan["Projections"], reverse=True
+    )
+    assert "fields" in baseline["Projections"]
+    assert "fields" not in typed["Projections"]
+    assert "updated>=" in typed["Filters"] and "updated<" in typed["Filters"]
+
+
+def test_list_workspaces_filters_in_duckdb(tmp_path):
+    """Test that list_workspaces filters the one cached build by agency and projects lists."""
+    import pandas
+
+    from wagov_squ.api import list_workspaces
+
+    persisted = tmp_path / "list_workspaces.parquet"
+    pandas.DataFrame(
+        {"alias": ["a", "a", "b"], "customerId": ["t2", "t1", "t3"], "domains": ["x", "y", "z"]}
+    ).to_parquet(persisted)
+    with patch("wagov_squ.api.list_workspaces_safe", return_value=str(persisted)) as build:
+        assert list_workspaces(fmt="list", agency="a") == ["t2", "t1"]
+        assert list_workspaces(fmt="list") == ["t2", "t1", "t3"]
+        assert list(list_workspaces(agency="b")["customerId"]) == ["t3"]
+        assert list_workspaces(fmt="json", agency="b")[0]["domains"] == "z"
+    assert all(call.args == () for call in build.call_args_list)
+
+
+def test_list_workspaces_keeps_nullable_dtypes(tmp_path):
+    """Test that nullable integer columns come back as Int64, not float with NaN."""
+    import pandas
+
+    from wagov_squ.api import list_workspaces
+
+    persisted = tmp_path / "list_workspaces.parquet"
+    pandas.DataFrame(
+        {"alias": ["a", "b"], "customerId": ["t1", "t2"], "JiraOrgId": [5, None]}
+    ).convert_dtypes().to_parquet(persisted)
+    with patch("wagov_squ.api.list_workspaces_safe", return_value=str(persisted)):
+        workspaces = list_workspaces()
+        assert workspaces["JiraOrgId"].dtype == "Int64"
+        assert workspaces["JiraOrgId"].isna().tolist() == [False, True]
+        assert list_workspaces(fmt="json", agency="a")[0]["JiraOrgId"] == 5
+
+
+def test_resource_graph_pages_and_partitions():
+    """Test that Resource Graph results follow skip tokens across concurrent subscription groups."""
+    import json
+    import threading
+
+    import httpx
+
+    from wagov_squ.api import resource_graph
+
+    subscriptions = [f"sub-{i}" for i in range(5)]
+    requests, lock, throttled = [], threading.Lock(), []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer token"
+        if request.method == "GET":  # subscriptions, two pages
+            first = "skiptoken" not in str(request.url)
+            page = subscriptions[:3] if first else subscriptions[3:]
+            body = {"value": [{"subscriptionId": sub} for sub in page]}
+            if first:
+                body["nextLink"] = "https://management.azure.com/subscriptions?skiptoken=2"
+            return httpx.Response(200, json=body)
+        body = json.loads(request.content)
+        with lock:
+            requests.append(body)
+            if not throttled:
+                throttled.append(body)
+                return httpx.Response(429)
+        token = body["options"].get("$skipToken")
+        group = body["subscriptions"]
+        rows = [{"subscriptionId": sub, "page": token or "first"} for sub in group]
+        return httpx.Response(200, json={"data": rows, "$skipToken": None if token else "next"})
+
+    real_client = httpx.Client
+    transport = httpx.MockTransport(handler)
+    with (
+        patch.object(httpx, "Client", lambda **kw: real_client(transport=transport, **kw)),
+        patch("wagov_squ.api.azure_credential") as credential,
+    ):
+        credential.get_token.return_value.token = "token"
+        df = resource_graph("resources", subscriptions_per_request=2)
+
+    assert len(df) == 10
+    assert sorted(df["subscriptionId"].unique()) == subscriptions
+    assert sorted(df["page"].unique()) == ["first", "next"]
+    answered = [body for body in requests if body is not throttled[0]]
+    assert len(requests) == 7  # 3 groups x 2 pages, plus the throttled retry
+    assert sorted(len(body["subscriptions"]) for body in answered) == [1, 1, 2, 2, 2, 2]
@@ -22,3 +22,63 @@ def test_dirs_configured():
     """Test that platform dirs are configured."""
     assert dirs is not None
     assert "nbdev-squ" in str(dirs.user_cache_dir)
+
+
+def test_memoize_stampede_shares_one_build():
+    """Test that concurrent callers wait for one computation and ignore_args shares one entry."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from wagov_squ.core import MemoryCache, memoize_stampede
+
+    calls = []
+    started = threading.Event()
+
+    @memoize_stampede(MemoryCache(), expire=60, ignore_args=True)
+    def build(fmt="df"):
+        calls.append(fmt)
+        started.set()
+        time.sleep(0.1)
+        return "built"
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(build, ["df", "list", "csv", "df"] * 2))
+    assert results == ["built"] * 8
+    assert len(calls) == 1
+
+    @memoize_stampede(MemoryCache(), expire=60)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    assert [square(2), square(3), square(2)] == [4, 9, 4]
+    assert calls[1:] == [2, 3]
+
+
+def test_datalake_path_mirror_covers_joined_paths(tmp_path):
+    """Test that paths joined from a mirrored datalake path read through the same mirror."""
+    from unittest.mock import patch
+
+    import fsspec
+
+    from wagov_squ.core import datalake_path
+    from wagov_squ.datalake import MirrorFileSystem
+
+    with (
+        patch("wagov_squ.core.datalake_path_safe", return_value=("container", "account", "sas")),
+        patch("wagov_squ.core.dirs") as mock_dirs,
+    ):
+        mock_dirs.user_cache_path = tmp_path
+        root = datalake_path(mirror=True)
+    lists = root / "notebooks" / "lists"
+    workspaces = lists / "SentinelWorkspaces.csv"
+    assert str(workspaces) == "mirror://container/notebooks/lists/SentinelWorkspaces.csv"
+    assert isinstance(root.fs, MirrorFileSystem) and workspaces.fs is root.fs
+    assert root.fs.target.account_name == "account"
+
+    root.fs.target = fsspec.filesystem("memory")  # stand in for the storage account
+    root.fs.target.pipe("/container/notebooks/lists/SentinelWorkspaces.csv", b"customerId\n")
+    assert workspaces.read_text() == "customerId\n"
+    assert next(lists.iterdir()).read_text() == "customerId\n"
+    assert (tmp_path / "datalake-mirror" / root.fs._key(workspaces.path)).exists()
@@ -0,0 +1,232 @@
+"""Tests for credentials module."""
+
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from wagov_squ.credentials import CredentialPool, PooledClient
+
+
+def _pool(strategy):
+    return CredentialPool([PooledClient(name, None, Mock()) for name in "abc"], strategy)
+
+
+def test_round_robin_rotates_members():
+    """Test that round robin hands out members in turn."""
+    pool = _pool("round_robin")
+    names = []
+    for _ in range(4):
+        member = pool.checkout()
+        names.append(member.name)
+        pool.release(member)
+
+    assert names == ["a", "b", "c", "a"]
+
+
+def test_least_loaded_prefers_idle_member_with_fewest_queries():
+    """Test that least loaded skips busy members and balances by queries sent."""
+    pool = _pool("least_loaded")
+    busy = pool.checkout(cost=190)
+    second = pool.checkout(cost=10)
+    pool.release(second)
+    third = pool.checkout(cost=10)
+
+    assert busy.name == "a"
+    assert second.name == "b"
+    assert third.name == "c"
+
+
+def test_checkout_times_out_when_all_busy():
+    """Test that checkout returns None when no member frees up in time."""
+    pool = CredentialPool([PooledClient("only", None, Mock())])
+    member = pool.checkout()
+
+    assert pool.checkout(timeout=0.05) is None
+    pool.release(member)
+    assert pool.checkout(timeout=0) is member
+
+
+def test_invalid_pool_configuration():
+    """Test that empty pools and unknown strategies are rejected."""
+    with pytest.raises(ValueError, match="at least one member"):
+        CredentialPool([])
+    with pytest.raises(ValueError, match="Unknown credential strategy"):
+        _pool("random")
+
+
+def test_credential_pool_from_config():
+    """Test that configured identities become pool members."""
+    from wagov_squ.core import cache
+    from wagov_squ.credentials import credential_pool
+    from wagov_squ.settings import create_settings_from_dict
+
+    config = create_settings_from_dict(
+        {
+            "loganalytics_credentials": [
+                {"name": "sp1", "tenant_id": "t", "client_id": "c1", "client_secret": "s"},
+                {"name": "mi", "client_id": "c2"},
+            ],
+            "loganalytics_credential_strategy": "round_robin",
+        }
+    )
+    with (
+        patch.dict(cache._items, clear=True),
+        patch("wagov_squ.credentials.ClientSecretCredential") as secret,
+        patch("wagov_squ.credentials.ManagedIdentityCredential") as managed,
+        patch("wagov_squ.credentials.LogsQueryClient"),
+    ):
+        cache.set("config", config)
+        pool = credential_pool()
+
+        assert [m.name for m in pool.members] == ["sp1", "mi"]
+        assert pool.strategy == "round_robin"
+        secret.assert_called_once_with("t", "c1", "s")
+        managed.assert_called_once_with(client_id="c2")
+        assert credential_pool() is pool
+
+
+def test_loganalytics_query_spreads_batches_across_identities(tmp_path):
+    """Test that batches run concurrently, one per pooled identity."""
+    import pandas as pd
+
+    from tests.test_api import _fake_result
+    from wagov_squ.api import loganalytics_query
+    from wagov_squ.scheduling import WorkspaceStats
+
+    running, peak, lock = [0], [0], threading.Lock()
+
+    def query_batch(requests):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.2)
+        with lock:
+            running[0] -= 1
+        return [_fake_result(request.workspace) for request in requests]
+
+    members = []
+    for name in ("sp1", "sp2"):
+        client = Mock()
+        client.query_batch.side_effect = query_batch
+        members.append(PooledClient(name, None, client))
+    workspaces = pd.DataFrame({"customerId": ["ws-a", "ws-b"], "alias": ["A", "B"]})
+    with (
+        patch("wagov_squ.api.credential_pool", return_value=CredentialPool(members)),
+        patch("wagov_squ.api.list_workspaces", return_value=workspaces),
+        patch("wagov_squ.api.workspace_stats", WorkspaceStats(tmp_path / "stats.sqlite")),
+    ):
+        results = loganalytics_query(
+            ["T"], sentinel_workspaces=workspaces, batch_size=1, batch_delay=0
+        )
+
+    assert peak[0] == 2
+    assert sorted(results["T"]["TenantId"]) == ["ws-a", "ws-b"]
+    assert all(member.client.query_batch.call_count == 1 for member in members)
+
+
+def _token_source(lifetime):
+    """A credential stand-in handing out numbered tokens valid for `lifetime` seconds."""
+    from azure.core.credentials import AccessToken
+
+    source = Mock()
+    counter = iter(range(100))
+    source.get_token.side_effect = lambda *scopes, **kwargs: AccessToken(
+        f"token-{next(counter)}", int(time.time() + lifetime)
+    )
+    return source
+
+
+def test_cached_token_credential_reuses_tokens_per_scope():
+    """Test that tokens are cached per scope and only fetched once."""
+    from wagov_squ.credentials import CachedTokenCredential
+
+    source = _token_source(3600)
+    credential = CachedTokenCredential(source)
+
+    first = credential.get_token("https://api.loganalytics.io/.default")
+    again = credential.get_token("https://api.loganalytics.io/.default")
+    other = credential.get_token("https://kusto.example/.default")
+
+    assert first is again
+    assert other.token != first.token
+    assert source.get_token.call_count == 2
+
+
+def test_cached_token_credential_refetches_expiring_tokens():
+    """Test that a token inside the expiry margin is replaced synchronously."""
+    from wagov_squ.credentials import CachedTokenCredential
+
+    source = _token_source(30)
+    credential = CachedTokenCredential(source, expiry_margin=60)
+
+    first = credential.get_token("scope")
+    second = credential.get_token("scope")
+
+    assert first.token != second.token
+
+
+def test_cached_token_credential_refreshes_in_background():
+    """Test that a token near expiry is returned while a refresh runs in the background."""
+    from wagov_squ.credentials import CachedTokenCredential
+
+    source = _token_source(300)
+    credential = CachedTokenCredential(source, refresh_margin=600, expiry_margin=60)
+
+    first = credential.get_token("scope")
+    assert credential.get_token("scope") is first  # served from cache, refresh started
+    for _ in range(50):
+        if source.get_token.call_count == 2:
+            break
+        time.sleep(0.01)
+    time.sleep(0.01)
+
+    assert credential.get_token("scope").token != first.token
+
+
+def test_cached_token_credential_stops_refreshing_unchanged_tokens():
+    """Test that a refresh returning the same expiry is not repeated on every request."""
+    from azure.core.credentials import AccessToken
+
+    from wagov_squ.credentials import CachedTokenCredential
+
+    expires_on = int(time.time() + 200)
+    source = Mock()
+    source.get_token.side_effect = lambda *scopes, **kwargs: AccessToken("token", expires_on)
+    credential = CachedTokenCredential(source)
+
+    credential.get_token("scope")
+    credential.get_token("scope")  # inside the refresh margin, starts a background refresh
+    for _ in range(50):
+        if source.get_token.call_count == 2 and not credential._refreshing:
+            break
+        time.sleep(0.01)
+    for _ in range(5):
+        credential.get_token("scope")
+    time.sleep(0.05)
+
+    assert source.get_token.call_count == 2
+
+
+def test_cached_token_credential_shares_concurrent_fetches():
+    """Test that concurrent first requests for a scope share one underlying fetch."""
+    from azure.core.credentials import AccessToken
+
+    from wagov_squ.credentials import CachedTokenCredential
+
+    source = Mock()
+
+    def slow_token(*scopes, **kwargs):
+        time.sleep(0.1)
+        return AccessToken("token", int(time.time() + 3600))
+
+    source.get_token.side_effect = slow_token
+    credential = CachedTokenCredential(source)
+    threads = [threading.Thread(target=credential.get_token, args=("scope",)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert source.get_token.call_count == 1
@@ -0,0 +1,137 @@
+"""Tests for datalake module."""
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+
+def _day(root, day: str, keys: list[str], name: str = "issues.parquet"):
+    path = root / day / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pd.DataFrame({"key": keys, "day": day}).to_parquet(path)
+    return path
+
+
+def test_compact_partitions_by_month(tmp_path):
+    """Test that settled months are merged into sorted monthly files and recent days are kept."""
+    from wagov_squ.datalake import compact_partitions, partition_files
+
+    _day(tmp_path, "2024-01-02", ["SQU-3", "SQU-1"])
+    _day(tmp_path, "2024-01-31", ["SQU-2"])
+    _day(tmp_path, "2024-02-10", ["SQU-5"])
+    recent = _day(tmp_path, f"{pd.Timestamp.now().date()}", ["SQU-9"])
+
+    assert compact_partitions(tmp_path, sort_by="key", row_group_size=2) == {
+        "2024-01": 2,
+        "2024-02": 1,
+    }
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["2024-01", "2024-02", recent.parent.name]
+    january = tmp_path / "2024-01" / "issues.parquet"
+    assert list(pd.read_parquet(january)["key"]) == ["SQU-1", "SQU-2", "SQU-3"]
+    metadata = pq.ParquetFile(january).metadata
+    assert metadata.num_row_groups == 2
+    assert metadata.row_group(0).column(0).statistics.max == "SQU-2"
+
+    # A late day for a compacted month stays hidden until it is folded into the month file
+    _day(tmp_path, "2024-01-15", ["SQU-4"])
+    assert partition_files(tmp_path, "2024-01-01", "2024-01-31") == [january]
+    compact_partitions(tmp_path, sort_by="key", dry_run=True)
+    assert (tmp_path / "2024-01-15").exists()
+    compact_partitions(tmp_path, sort_by="key")
+    assert list(pd.read_parquet(january)["key"]) == ["SQU-1", "SQU-2", "SQU-3", "SQU-4"]
+    assert not list(tmp_path.glob("*/*.partial"))
+
+
+def test_partition_files_prunes_and_prefers_months(tmp_path):
+    """Test pruning by date and that day files left behind by a compaction are not read twice."""
+    from wagov_squ.datalake import partition_files
+
+    month = _day(tmp_path, "date=2024-01", ["SQU-1", "SQU-2"])
+    _day(tmp_path, "date=2024-01-05", ["SQU-1"])  # removed next by an interrupted compaction
+    other = _day(tmp_path, "date=2024-01-05", ["SQU-2"], name="changelog.parquet")
+    march = _day(tmp_path, "date=2024-03-01", ["SQU-7"])
+    _day(tmp_path, "notes", ["SQU-0"])
+
+    assert partition_files(tmp_path) == [month, other, march]
+    assert partition_files(tmp_path, start="2024-02-01") == [march]
+    assert partition_files(tmp_path, end=pd.Timestamp("2024-01-31 23:00")) == [month, other]
+    assert partition_files(tmp_path / "missing") == []
+
+
+def test_mirror_serves_unchanged_files_locally(tmp_path):
+    """Test that reads are mirrored, revalidated against the remote and evicted least-recent first."""
+    from unittest.mock import patch
+
+    import fsspec
+
+    from wagov_squ.datalake import MirrorFileSystem, MirrorPath
+
+    remote = fsspec.filesystem("memory")
+    remote.pipe({"/lists/a.csv": b"alias\na\n", "/lists/b.csv": b"b" * 60, "/c.csv": b"c" * 60})
+    lists = MirrorPath(
+        "mirror:///lists",
+        remote_protocol="memory",
+        directory=str(tmp_path / "mirror"),
+        max_bytes=100,
+    )
+    mirror = lists.fs
+    assert isinstance(mirror, MirrorFileSystem) and mirror.target is remote
+
+    with patch.object(remote, "get_file", wraps=remote.get_file) as downloads:
+        assert (lists / "a.csv").read_text() == "alias\na\n"
+        assert next(lists.glob("a.*")).read_text() == "alias\na\n"
+        assert downloads.call_count == 1
+        assert str(lists / "a.csv") == "mirror:///lists/a.csv"
+
+        remote.pipe("/lists/a.csv", b"alias\na\nb\n")  # changed upstream
+        assert (lists / "a.csv").read_text() == "alias\na\nb\n"
+        assert downloads.call_count == 2
+
+        (lists / "b.csv").read_bytes()
+        mirror.open("/c.csv").close()  # over max_bytes: a.csv and then b.csv are evicted
+        assert sorted(p.name for p in (tmp_path / "mirror").iterdir()) == [
+            mirror._key("/c.csv"),
+            "index.sqlite",
+        ]
+
+        (lists / "b.csv").write_bytes(b"new")  # writes go to the remote
+        assert remote.cat("/lists/b.csv") == b"new"
+        assert (lists / "b.csv").read_bytes() == b"new"
+        assert downloads.call_count == 5
+
+
+def test_mirror_concurrent_fills_share_no_partial(tmp_path):
+    """Test that threads mirroring the same file at once each download to their own partial."""
+    import threading
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    import fsspec
+
+    from wagov_squ.datalake import MirrorFileSystem
+
+    remote = fsspec.filesystem("memory")
+    remote.pipe("/race/big.bin", b"x" * 100_000)
+    partials = set()
+    lock = threading.Lock()
+    get_file = remote.get_file
+
+    def slow_get_file(rpath, lpath, **kwargs):
+        with lock:
+            partials.add(lpath)
+        time.sleep(0.05)
+        get_file(rpath, lpath, **kwargs)
+
+    mirror = MirrorFileSystem(fs=remote, directory=tmp_path / "mirror")
+    remote.get_file = slow_get_file
+    try:
+
+        def read():
+            with mirror.open("/race/big.bin") as f:
+                return f.read()
+
+        with ThreadPoolExecutor(4) as pool:
+            assert list(pool.map(lambda _: read(), range(4))) == [b"x" * 100_000] * 4
+    finally:
+        del remote.get_file
+    assert len(partials) == 4
+    assert not list((tmp_path / "mirror").glob("*.partial"))
@@ -0,0 +1,690 @@
+"""Tests for legacy module."""
+
+import json
+import time
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+
+def _incidents(count: int, tenants: int = 20) -> pd.DataFrame:
+    """SecurityIncident rows shaped like `security_incidents()`, with JSON columns as strings."""
+    rows = []
+    for i in range(count):
+        alerts = [
+            {
+                "AlertName": f"Suspicious Login {j}",
+                "AlertSeverity": "High",
+                "TimeGenerated": "2023-01-01T10:00:00Z",
+                "AlertLink": f"https://portal.azure.com/alert/{i}{j}",
+                "Description": "Failed login attempts from unknown IP",
+                "ExtendedProperties": json.dumps({"Query Period": "1 day", "Count": str(j)}),
+                "Entities": json.dumps([{"Type": "ip", "Address": f"10.0.{i % 250}.{j}"}]),
+            }
+            for j in range(3)
+        ]
+        rows.append(
+            {
+                "IncidentNumber": str(1000 + i),
+                "Title": "Suspicious Login Activity",
+                "Severity": "High",
+                "Status": "Active",
+                "Description": "Multiple failed login attempts detected",
+                "IncidentUrl": f"https://portal.azure.com/incident/{1000 + i}",
+                "TenantId": f"tenant-{i % tenants}",
+                "Labels": json.dumps([{"labelName": "bruteforce"}]),
+                "Owner": json.dumps({"email": None}) if i % 2 else None,
+                "AdditionalData": json.dumps({"alertProductNames": ["Azure Sentinel"]}),
+                "Comments": json.dumps([{"message": "Checked by analyst"}] if i % 3 == 0 else []),
+                "Classification": None,
+                "AlertData": alerts,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def _workspaces(tenants: int = 200) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {"customerId": f"tenant-{i}", "SecOps Status": "Active", "JiraOrgId": i}
+            for i in range(tenants)
+        ]
+    )
+
+
+@pytest.fixture(autouse=True)
+def workspace_listing(tmp_path):
+    """
+    Stand in for the cached workspace list file the tenant index is keyed on, and keep the index
+    from leaking between tests with different workspace lists.
+    """
+    from wagov_squ.core import cache
+
+    listing = tmp_path / "list_workspaces.parquet"
+    listing.touch()
+    cache.delete("customer_index")
+    with patch("wagov_squ.legacy.api.list_workspaces_safe", return_value=str(listing)):
+        yield listing
+    cache.delete("customer_index")
+
+
+def _fake_pool():
+    """Transformer pool stand-in for documents outside the in-process markdown subset."""
+    pool = MagicMock()
+    pool.transform.side_effect = lambda text, *args: f"node:{len(text)}\n"
+    pool.transform_many.side_effect = lambda texts, *args: [f"node:{len(t)}\n" for t in texts]
+    return pool
+
+
+def test_sentinel_beautify_batch_matches_single():
+    """Test that batch payloads match sentinel_beautify_local row by row."""
+    from wagov_squ.legacy import sentinel_beautify_batch, sentinel_beautify_local
+
+    incidents = _incidents(12, tenants=5)
+    workspaces = _workspaces(3)  # tenants 3 and 4 fall back to the defaults
+    with (
+        patch("wagov_squ.api.transformer_pool", return_value=_fake_pool()),
+        patch("wagov_squ.legacy.api.list_workspaces", return_value=workspaces) as listing,
+    ):
+        batch = sentinel_beautify_batch(incidents)
+        assert listing.call_count == 1
+        rows = incidents.astype(object).where(incidents.notna(), None).to_dict("records")
+        single = [sentinel_beautify_local(row) for row in rows]
+
+    assert len(batch) == 12
+    for got, expected in zip(batch, single):
+        assert sorted(got.pop("labels")) == sorted(expected.pop("labels"))
+        assert got == expected
+    assert batch[4]["secops_status"] == "Onboard: MOU (T0)" and batch[4]["jira_orgid"] == 2
+    assert batch[1]["jira_orgid"] == 1
+    assert batch[0]["wikimarkup"].startswith("h1. SIEM Detection #1000")
+
+
+def test_sentinel_beautify_batch_isolates_render_failures():
+    """Test that an incident the transformer rejects keeps its markdown instead of failing the batch."""
+    from wagov_squ.exceptions import TransformError
+    from wagov_squ.legacy import sentinel_beautify_batch
+
+    incidents = _incidents(2)
+    with (
+        patch(
+            "wagov_squ.legacy.api.atlaskit_transformer",
+            return_value=["h1. ok\n", TransformError("cannot parse")],
+        ),
+        patch("wagov_squ.legacy.api.list_workspaces", return_value=_workspaces()),
+    ):
+        first, second = sentinel_beautify_batch(incidents)
+
+    assert first["wikimarkup"] == "h1. ok\n"
+    assert second["wikimarkup"].startswith("# SIEM Detection #1001")
+    assert sentinel_beautify_batch(incidents.iloc[:0]) == []
+
+
+def test_customer_index_is_cached_and_read_only():
+    """Test that tenant lookups reuse one immutable index built from a single workspace listing."""
+    from wagov_squ.legacy import _customer_index, _get_customer_info
+
+    with patch("wagov_squ.legacy.api.list_workspaces", return_value=_workspaces()) as listing:
+        infos = [_get_customer_info(f"tenant-{i}", "default", 2) for i in range(300)]
+        index = _customer_index()
+
+    assert listing.call_count == 1
+    assert infos[7]["jira_orgid"] == 7 and infos[250]["jira_orgid"] == 2
+    with pytest.raises(TypeError):
+        index["tenant-new"] = {}
+    with pytest.raises(TypeError):
+        index["tenant-1"]["JiraOrgId"] = 99
+    infos[1]["customer"]["JiraOrgId"] = 99  # payloads get their own copy
+    assert index["tenant-1"]["JiraOrgId"] == 1
+
+
+def test_customer_index_follows_workspace_refresh(workspace_listing):
+    """Test that the tenant index is rebuilt whenever the workspace list file is rebuilt."""
+    import os
+
+    from wagov_squ.legacy import _customer_index
+
+    with patch("wagov_squ.legacy.api.list_workspaces", return_value=_workspaces(1)) as listing:
+        assert list(_customer_index()) == ["tenant-0"]
+        assert list(_customer_index()) == ["tenant-0"]
+        assert listing.call_count == 1
+
+    stamp = os.stat(workspace_listing).st_mtime_ns
+    os.utime(workspace_listing, ns=(stamp + 10**9, stamp + 10**9))  # list_workspaces_safe rebuilt
+    with patch("wagov_squ.legacy.api.list_workspaces", return_value=_workspaces(2)):
+        assert sorted(_customer_index()) == ["tenant-0", "tenant-1"]
+
+
+@pytest.mark.slow
+def test_sentinel_beautify_batch_throughput():
+    """Benchmark incidents per second for the batch pipeline against the per-incident loop."""
+    from wagov_squ.legacy import sentinel_beautify_batch, sentinel_beautify_local
+
+    incidents = _incidents(2000)
+    with (
+        patch("wagov_squ.api.transformer_pool", return_value=_fake_pool()),
+        patch("wagov_squ.legacy.api.list_workspaces", return_value=_workspaces()),
+    ):
+        rows = incidents.astype(object).where(incidents.notna(), None).to_dict("records")
+        sentinel_beautify_batch(incidents.head(10))  # warm up the tenant index and imports
+        batch_rate = single_rate = 0.0
+        for _ in range(3):  # best of three, so a stray pause does not decide the comparison
+            started = time.perf_counter()
+            batch = sentinel_beautify_batch(incidents)
+            batch_rate = max(batch_rate, len(batch) / (time.perf_counter() - started))
+
+            started = time.perf_counter()
+            single = [sentinel_beautify_local(row) for row in rows]
+            single_rate = max(single_rate, len(single) / (time.perf_counter() - started))
+
+    print(f"sentinel_beautify_batch: {batch_rate:,.0f} incidents/s")
+    print(f"sentinel_beautify_local loop: {single_rate:,.0f} incidents/s")
+    assert len(batch) == len(single) == 2000
+    assert batch_rate > single_rate
+
+
+def _fake_jira(
+    days: dict, page_size: int = 2, delay: float = 0.0, spread: int = 1440, timezone=None
+):
+    """
+    Jira client stand-in holding `days[date] = issue count` issues, updated across the first
+    `spread` minutes of each day, serving enhanced_jql pages and approximate counts by window.
+    JQL times are read in the profile `timezone` (default: this host's), like Jira does.
+    """
+    import random
+    import re
+
+    from dateutil.tz import tzlocal
+
+    timezone = timezone or tzlocal()
+
+    issues = [
+        {
+            "key": f"SQU-{day.replace('-', '')}{i:05d}",
+            "fields": {"updated": f"{pd.Timestamp(day) + pd.Timedelta(minutes=i * 7 % spread)}"},
+        }
+        for day, count in days.items()
+        for i in range(count)
+    ]
+
+    def matching(jql):
+        start, end = (
+            pd.Timestamp(v) for v in re.findall(r'updated [<>]=? "?([\d-]+(?: [\d:]+)?)', jql)
+        )
+        found = []
+        for issue in issues:
+            updated = pd.Timestamp(issue["fields"]["updated"])
+            if updated.tzinfo is not None:
+                updated = updated.tz_convert(timezone).tz_localize(None)
+            if start <= updated < end:
+                found.append(issue)
+        return found
+
+    def enhanced_jql(jql, limit=None, **kwargs):
+        time.sleep(random.random() * delay)
+        start = int(kwargs["nextPageToken"] or 0)
+        found = matching(jql)
+        more = start + page_size < len(found)
+        return {
+            "issues": found[start : start + page_size],
+            "nextPageToken": str(start + page_size) if more else None,
+        }
+
+    jira = MagicMock()
+    jira.issues = issues  # edit between runs to simulate Jira activity
+    jira.enhanced_jql.side_effect = enhanced_jql
+    jira.myself.return_value = {"timeZone": timezone}
+    jira.approximate_issue_count.side_effect = lambda jql: {"count": len(matching(jql))}
+    return jira
+
+
+def _export_dates(days_to_export: int) -> list[str]:
+    start = pd.Timestamp.now() - pd.Timedelta(days=days_to_export)
+    return [str((start + pd.Timedelta(days=i)).date()) for i in range(days_to_export + 1)]
+
+
+def test_export_jira_issues_parallel_days(tmp_path, caplog):
+    """Test that concurrent day exports write every partition and log progress in day order."""
+    import logging
+    import re
+
+    from wagov_squ.legacy import export_jira_issues
+
+    dates = _export_dates(6)
+    counts = {date: i + 1 for i, date in enumerate(dates[:-1])}
+    existing = tmp_path / "jira_outputs/issues" / dates[2] / "issues.parquet"
+    existing.parent.mkdir(parents=True)
+    existing.write_bytes(b"kept")
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+        caplog.at_level(logging.INFO, logger="wagov_squ.legacy"),
+    ):
+        clients.jira = _fake_jira(counts, delay=0.02)
+        export_jira_issues(
+            days_to_export=6, max_workers=4, requests_per_second=1000, current_state=False
+        )
+
+    assert existing.read_bytes() == b"kept"  # skip-existing is unchanged
+    for date in dates[:-1]:
+        if date != dates[2]:
+            issues = pd.read_parquet(tmp_path / "jira_outputs/issues" / date / "issues.parquet")
+            assert len(issues) == counts[date]
+    days = [r.message for r in caplog.records if re.fullmatch(r"Processing \S+-\S+-\S+", r.message)]
+    assert days == [f"Processing {date}" for date in dates]
+    saved = [r.message for r in caplog.records if r.message.startswith("Saved ")]
+    assert [message.split("/")[-2] for message in saved] == [d for d in dates[:-1] if d != dates[2]]
+
+
+def test_jira_call_retries_rate_limits():
+    """Test that 429 responses are retried after Retry-After and other errors are raised."""
+    from requests import HTTPError, Response
+
+    from wagov_squ.legacy import _jira_call
+
+    def error(status, retry_after=None):
+        response = Response()
+        response.status_code = status
+        if retry_after is not None:
+            response.headers["Retry-After"] = retry_after
+        return HTTPError(f"{status}", response=response)
+
+    method = MagicMock(side_effect=[error(429, "0"), error(429, "0"), {"issues": []}])
+    assert _jira_call(method, "jql", limit=5, requests_per_second=1000) == {"issues": []}
+    assert method.call_count == 3
+    method.assert_called_with("jql", limit=5)
+
+    method = MagicMock(side_effect=error(400))
+    with pytest.raises(HTTPError, match="400"):
+        _jira_call(method, "jql", requests_per_second=1000)
+    assert method.call_count == 1
+
+
+def test_export_jira_issues_reports_failed_day(tmp_path):
+    """Test that a failing day stops a parallel export with its original error."""
+    from wagov_squ.legacy import export_jira_issues
+
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira.enhanced_jql.side_effect = RuntimeError("Jira unavailable")
+        with pytest.raises(RuntimeError, match="Jira unavailable"):
+            export_jira_issues(days_to_export=3, max_workers=2, requests_per_second=1000)
+
+
+def test_export_jira_issues_shards_heavy_day(tmp_path, caplog):
+    """Test that a heavy day is split into concurrent windows without losing or repeating issues."""
+    import logging
+
+    from wagov_squ.legacy import export_jira_issues
+
+    day = _export_dates(2)[0]
+    jira = _fake_jira({day: 300}, page_size=10, spread=90)  # a bulk edit in the first 90 minutes
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+        caplog.at_level(logging.INFO, logger="wagov_squ.legacy"),
+    ):
+        clients.jira = jira
+        export_jira_issues(days_to_export=2, requests_per_second=1000, shard_threshold=40)
+
+    issues = pd.read_parquet(tmp_path / "jira_outputs/issues" / day / "issues.parquet")
+    assert len(issues) == 300 and issues["key"].is_unique
+    splits = [r.message for r in caplog.records if r.message.startswith("Splitting")]
+    assert splits[0] == f"Splitting {day} into 24 windows of 60 minutes"
+    assert any("windows of 15 minutes" in message for message in splits)
+    queried = [c.args[0] for c in jira.enhanced_jql.call_args_list]
+    assert f'updated >= "{day} 00:00" and updated < "{day} 00:15" order by key' in queried
+
+
+def test_export_jira_issues_incremental(tmp_path):
+    """Test that incremental runs fetch from the watermark and upsert into day partitions."""
+    import json
+
+    from wagov_squ.legacy import export_jira_issues
+
+    first, second, today = _export_dates(2)
+    jira = _fake_jira({first: 5, second: 5})
+    manifest = tmp_path / "jira_outputs/issues_manifest.json"
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira = jira
+        export_jira_issues(days_to_export=2, requests_per_second=1000, incremental=True)
+        assert json.loads(manifest.read_text())["watermark"] == f"{second} 00:28:00"
+
+        manifest.write_text(json.dumps({"watermark": f"{second} 00:20"}))
+        jira.issues[-1]["fields"] |= {"summary": "edited", "updated": f"{second} 00:29:00"}
+        jira.issues.append({"key": "SQU-NEW", "fields": {"updated": f"{today} 00:00:00"}})
+        jira.enhanced_jql.reset_mock()
+        export_jira_issues(days_to_export=2, requests_per_second=1000, incremental=True)
+
+    queried = jira.enhanced_jql.call_args_list[0].args[0]
+    assert queried.startswith(f'updated >= "{second} 00:10" and updated < "{today} ')
+    partition = pd.read_parquet(tmp_path / "jira_outputs/issues" / second / "issues.parquet")
+    assert len(partition) == 5 and partition["key"].is_unique
+    assert json.loads(partition["fields"].iloc[-1])["summary"] == "edited"
+    new = pd.read_parquet(tmp_path / "jira_outputs/issues" / today / "issues.parquet")
+    assert list(new["key"]) == ["SQU-NEW"]
+    recorded = json.loads(manifest.read_text())
+    assert recorded["issues"] == 4 and recorded["watermark"] == f"{today} 00:00:00"
+
+
+def test_export_jira_issues_watermark_in_jira_timezone(tmp_path):
+    """Test that the watermark is the latest `updated` stamp, queried in the Jira user's zone."""
+    import json
+
+    from wagov_squ.legacy import export_jira_issues
+
+    now = pd.Timestamp.now(tz="UTC").floor("min")
+    watermark = (now - pd.Timedelta(hours=1)).tz_convert("Australia/Perth")
+    jira = _fake_jira({}, timezone="UTC")
+    jira.issues.append(
+        {
+            "key": "SQU-1",
+            "fields": {"updated": f"{now - pd.Timedelta(minutes=30):%Y-%m-%dT%H:%M:%S.000%z}"},
+        }
+    )
+    manifest = tmp_path / "jira_outputs/issues_manifest.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text(json.dumps({"watermark": str(watermark)}))
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira = jira
+        export_jira_issues(requests_per_second=1000, incremental=True)
+
+    queried = jira.enhanced_jql.call_args_list[0].args[0]
+    assert queried.startswith(f'updated >= "{now - pd.Timedelta(minutes=70):%Y-%m-%d %H:%M}"')
+    recorded = pd.Timestamp(json.loads(manifest.read_text())["watermark"])
+    assert recorded == now - pd.Timedelta(minutes=30) and recorded.tzinfo is not None
+
+
+def test_export_jira_issues_merges_delta_into_compacted_month(tmp_path):
+    """Test that delta issues for a compacted day replace only that day's rows in the month file."""
+    import json
+
+    from wagov_squ.legacy import _write_issues, export_jira_issues
+
+    perth = "Australia/Perth"
+    edited = pd.Timestamp.now(tz=perth).floor("min") - pd.Timedelta(minutes=30)
+    other = edited - pd.Timedelta(days=1) if edited.day > 1 else edited + pd.Timedelta(days=1)
+
+    def issue(key, updated, summary):
+        return {
+            "key": key,
+            "fields": {"updated": f"{updated:%Y-%m-%dT%H:%M:%S.000%z}", "summary": summary},
+        }
+
+    root = tmp_path / "jira_outputs/issues"
+    month = root / f"{edited:%Y-%m}" / "issues.parquet"
+    day_start = edited.normalize()
+    _write_issues(
+        [
+            [
+                issue("SQU-1", other, "other day"),
+                issue("SQU-1", day_start, "old"),
+                issue("SQU-2", day_start, "kept"),
+            ]
+        ],
+        month,
+    )
+    (root.parent / "issues_manifest.json").write_text(
+        json.dumps({"watermark": str(edited - pd.Timedelta(minutes=30))})
+    )
+    jira = _fake_jira({}, timezone=perth)
+    jira.issues.append(issue("SQU-1", edited, "edited"))
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira = jira
+        export_jira_issues(requests_per_second=1000, incremental=True, current_state=False)
+
+    assert not (root / f"{edited.date()}").exists()  # would be hidden behind the month file
+    merged = pd.read_parquet(month)
+    summaries = sorted(json.loads(fields)["summary"] for fields in merged["fields"])
+    assert summaries == ["edited", "kept", "other day"]
+
+
+def test_export_jira_issues_splits_uneven_delta(tmp_path):
+    """Test that a heavy delta which is not a whole number of windows keeps its last minutes."""
+    import json
+
+    from wagov_squ.legacy import export_jira_issues
+
+    now = pd.Timestamp.now().floor("min")
+    jira = _fake_jira({})
+    jira.issues += [
+        {"key": f"SQU-{i}", "fields": {"updated": f"{now - pd.Timedelta(seconds=180 - i)}"}}
+        for i in range(30)
+    ]
+    manifest = tmp_path / "jira_outputs/issues_manifest.json"
+    manifest.parent.mkdir(parents=True)
+    manifest.write_text(json.dumps({"watermark": str(now - pd.Timedelta(minutes=187 - 10))}))
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira = jira
+        export_jira_issues(requests_per_second=1000, incremental=True, shard_threshold=10)
+
+    saved = pd.concat(
+        pd.read_parquet(path) for path in (tmp_path / "jira_outputs/issues").rglob("*.parquet")
+    )
+    assert sorted(saved["key"]) == sorted(f"SQU-{i}" for i in range(30))
+
+
+def test_export_jira_issues_current_state(tmp_path):
+    """Test that the latest-state table keeps one row per issue, newest copy wins, by project."""
+    import json
+
+    import duckdb
+
+    from wagov_squ.legacy import export_jira_issues
+
+    first, second, today = _export_dates(2)
+    jira = _fake_jira({first: 3, second: 3})
+    jira.issues += [
+        {"key": "OPS-1", "fields": {"updated": f"{first} 09:00:00", "summary": "old"}},
+        {"key": "OPS-1", "fields": {"updated": f"{second} 09:00:00", "summary": "new"}},
+    ]
+    current = tmp_path / "jira_outputs/issues_current"
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira = jira
+        export_jira_issues(days_to_export=2, requests_per_second=1000, incremental=True)
+        assert sorted(p.name for p in current.iterdir()) == ["project=OPS", "project=SQU"]
+
+        jira.issues.append(
+            {"key": "OPS-1", "fields": {"updated": f"{today} 00:00:00", "summary": "edit"}}
+        )
+        export_jira_issues(days_to_export=2, requests_per_second=1000, incremental=True)
+
+    rows = duckdb.sql(
+        f"select project, key, fields from read_parquet('{current}/*/*.parquet', hive_partitioning=1)"
+    ).df()
+    assert len(rows) == 7 and rows["key"].is_unique
+    ops = rows[rows["project"] == "OPS"]
+    assert json.loads(ops["fields"].iloc[0])["summary"] == "edit"
+
+
+def test_issues_table_typed_columns():
+    """Test that selected fields become typed columns and the raw JSON column is optional."""
+    from wagov_squ.legacy import _issues_table
+
+    issues = [
+        {
+            "key": "SQU-1",
+            "fields": {
+                "status": {"name": "Done", "statusCategory": {"key": "done"}},
+                "labels": ["soc", "triage"],
+                "updated": "2024-01-01T10:15:30.000+0800",
+                "customfield_1": {"value": "Blue"},
+            },
+        },
+        {"key": "SQU-2", "fields": {"updated": "2024-01-02T00:00:00.000+0000"}},
+    ]
+    table = _issues_table(issues)
+    assert table["status"].to_pylist() == ["Done", None]
+    assert table["labels"].to_pylist() == [["soc", "triage"], None]
+    assert str(table["updated"][0]) == "2024-01-01 02:15:30+00:00"
+    assert table.schema.field("created").type == pa.timestamp("us", tz="UTC")
+    assert "fields" in table.column_names
+
+    columns = {"team": ("customfield_1.value", pa.string()), "custom": "customfield_1"}
+    table = _issues_table(issues, columns=columns, raw_fields=False)
+    assert table.column_names == ["key", "team", "custom", "updated"]
+    assert table["team"].to_pylist() == ["Blue", None]
+    assert table["custom"].to_pylist() == ['{"value": "Blue"}', None]
+
+    later = _issues_table(issues[1:], table.schema, columns, raw_fields=False)
+    assert later.schema == table.schema
+
+
+def test_export_jira_issues_field_projection(tmp_path):
+    """Test that exports request only the fields behind their columns, in the largest pages."""
+    from wagov_squ.legacy import export_jira_issues
+
+    day = _export_dates(1)[0]
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+    ):
+        clients.jira = _fake_jira({day: 3})
+        export_jira_issues(days_to_export=1, requests_per_second=1000, current_state=False)
+        kwargs = clients.jira.enhanced_jql.call_args.kwargs
+        assert kwargs["limit"] == 100 and kwargs["expand"] is None
+        assert "status" in kwargs["fields"] and "description" not in kwargs["fields"]
+
+        clients.jira = _fake_jira({day: 3})
+        export_jira_issues(
+            days_to_export=1,
+            requests_per_second=1000,
+            force_refresh=True,
+            current_state=False,
+            fields="id,key",
+            expand="changelog",
+        )
+        kwargs = clients.jira.enhanced_jql.call_args_list[0].kwargs
+        assert kwargs == {  # partitions and the watermark need `updated`, so it is always added
+            "fields": ["id", "key", "updated"],
+            "expand": "changelog",
+            "limit": 100,
+            "nextPageToken": None,
+        }
+
+
+def test_jira_fields_keep_updated():
+    """Test that `updated` is requested with any field selection except every field."""
+    from wagov_squ.legacy import _column_spec, _jira_fields
+
+    columns = _column_spec({"team": "customfield_1.value"})
+    assert _jira_fields(columns) == ["customfield_1", "updated"]
+    assert _jira_fields(columns, "summary, status") == ["summary", "status", "updated"]
+    assert _jira_fields(columns, ["*all"]) == ["*all"]
+
+
+def test_issues_table_without_fields():
+    """Test that pages whose issues carry no `fields` still build a table."""
+    from wagov_squ.legacy import _issues_table
+
+    table = _issues_table([{"id": "1", "key": "SQU-1"}, {"id": "2", "key": "SQU-2"}])
+    assert table["key"].to_pylist() == ["SQU-1", "SQU-2"]
+    assert table["fields"].to_pylist() == ["{}", "{}"]
+    assert table["updated"].null_count == 2
+
+
+def test_export_jira_issues_skips_unchanged(tmp_path, caplog):
+    """Test that refreshed partitions are only rewritten when their issues or settings change."""
+    import logging
+
+    from wagov_squ.legacy import export_jira_issues
+
+    day = _export_dates(1)[0]
+    output = tmp_path / "jira_outputs/issues" / day / "issues.parquet"
+    jira = _fake_jira({day: 5})
+    with (
+        patch("wagov_squ.legacy.core.datalake_path", return_value=tmp_path),
+        patch("wagov_squ.legacy.api.clients") as clients,
+        caplog.at_level(logging.INFO, logger="wagov_squ.legacy"),
+    ):
+        clients.jira = jira
+        options = {"days_to_export": 1, "requests_per_second": 1000, "force_refresh": True}
+        export_jira_issues(**options)
+        written = output.stat().st_mtime_ns
+        export_jira_issues(**options)
+        assert output.stat().st_mtime_ns == written
+        assert any(r.message.startswith("Unchanged 5 issues") for r in caplog.records)
+
+        jira.issues[0]["fields"]["updated"] = f"{day} 12:00:00"
+        export_jira_issues(**options)
+        assert output.stat().st_mtime_ns != written
+        written = output.stat().st_mtime_ns
+        export_jira_issues(**options, raw_fields=False)
+        assert output.stat().st_mtime_ns != written
+        assert "fields" not in pd.read_parquet(output).columns
+
+
+def test_background_pages_prefetch_and_errors():
+    """Test that sources are drained concurrently and a failing source raises in the consumer."""
+    from wagov_squ.legacy import _background_pages
+
+    sources = [iter(range(i * 10, i * 10 + 5)) for i in range(4)]
+    assert sorted(_background_pages(sources, workers=2)) == [
+        i * 10 + j for i in range(4) for j in range(5)
+    ]
+    assert list(_background_pages([iter(range(5))], workers=1)) == list(range(5))
+
+    def failing():
+        yield 1
+        raise RuntimeError("page failed")
+
+    with pytest.raises(RuntimeError, match="page failed"):
+        list(_background_pages([failing()], workers=1))
+
+
+def test_write_issues_streams_row_groups(tmp_path):
+    """Test that each page becomes a row group and an interrupted write leaves no partition."""
+    import pyarrow.parquet as pq
+
+    from wagov_squ.legacy import _write_issues
+
+    def pages(count, fail=False):
+        for page in range(count):
+            yield [
+                {"key": f"SQU-{page}{i}", "expand": None if page == 0 else "x", "fields": {"i": i}}
+                for i in range(3)
+            ]
+        if fail:
+            raise RuntimeError("Jira unavailable")
+
+    output = tmp_path / "2024-01-01" / "issues.parquet"
+    assert _write_issues(pages(4), output) == (12, True)
+    assert pq.ParquetFile(output).num_row_groups == 4
+    issues = pd.read_parquet(output)
+    assert issues["fields"].iloc[1] == '{"i": 1}' and issues["expand"].iloc[-1] == "x"
+    assert list(output.parent.iterdir()) == [output]
+
+    def changelog(page):
+        histories = [{"id": f"{page}", "items": [{"field": "status"}]}] if page else []
+        return [{"key": f"SQU-{page}", "fields": {}, "changelog": {"histories": histories}}]
+
+    expanded = tmp_path / "2024-01-04" / "issues.parquet"
+    assert _write_issues(map(changelog, range(3)), expanded) == (3, True)
+    histories = [json.loads(c)["histories"] for c in pd.read_parquet(expanded)["changelog"]]
+    assert histories[0] == [] and histories[2] == [{"id": "2", "items": [{"field": "status"}]}]
+
+    failed = tmp_path / "2024-01-02" / "issues.parquet"
+    with pytest.raises(RuntimeError, match="Jira unavailable"):
+        _write_issues(pages(2, fail=True), failed)
+    assert list(failed.parent.iterdir()) == []
+    assert _write_issues(pages(0), tmp_path / "2024-01-03" / "issues.parquet") == (0, False)
+    assert not (tmp_path / "2024-01-03").exists()
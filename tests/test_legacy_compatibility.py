@@ -113,7 +113,7 @@ echo "test"
             raise
 
 
-def test_sentinel_beautify_local_integration():
+def test_sentinel_beautify_local_integration(tmp_path):
     """Test the sentinel_beautify_local function."""
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", DeprecationWarning)
@@ -144,8 +144,13 @@ def test_sentinel_beautify_local_integration():
         ],
     }
 
-    # Mock only the list_workspaces function, let atlaskit_transformer run naturally
-    with patch("wagov_squ.legacy.api.list_workspaces") as mock_workspaces:
+    # Mock only the workspace listing, let atlaskit_transformer run naturally
+    listing = tmp_path / "list_workspaces.parquet"
+    listing.touch()
+    with (
+        patch("wagov_squ.legacy.api.list_workspaces_safe", return_value=str(listing)),
+        patch("wagov_squ.legacy.api.list_workspaces") as mock_workspaces,
+    ):
         # Mock dataframe-like object for list_workspaces
         import pandas as pd
 
@@ -203,15 +208,19 @@ def test_flatten_utility_function():
     assert result == expected
 
 
-def test_atlaskit_transformer_error_handling():
+def test_atlaskit_transformer_error_handling(tmp_path):
     """Test error handling in atlaskit_transformer when bundle is missing."""
     from wagov_squ.api import atlaskit_transformer
 
-    with patch("wagov_squ.api.pkgutil.get_data") as mock_get_data:
+    with (
+        patch("wagov_squ.transformer.pkgutil.get_data") as mock_get_data,
+        patch("wagov_squ.transformer.dirs") as mock_dirs,
+    ):
         mock_get_data.return_value = None
+        mock_dirs.user_cache_path = tmp_path  # no bundle cached from an earlier run
 
         with pytest.raises(FileNotFoundError, match="atlaskit-transformer.bundle.js not found"):
-            atlaskit_transformer("# Test", "md", "wiki")
+            atlaskit_transformer("# Test", "md", "wiki", fastpath=False)
 
 
 @pytest.mark.integration
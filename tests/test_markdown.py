@@ -0,0 +1,175 @@
+"""Tests for markdown module."""
+
+import json
+import shutil
+
+import pytest
+
+from wagov_squ.markdown import fast_transform, fast_transform_many, parse_subset
+
+INCIDENT = "\n".join(
+    [
+        "# SIEM Detection #12345 Sev:High - Suspicious Login Activity (Status:Active)",
+        "",
+        "## [SecurityIncident #12345 Details](https://portal.azure.com/incident/12345)",
+        "",
+        "Multiple failed login attempts detected",
+        "",
+        "- **Alert Classification:** TruePositive",
+        "- **Product Names:** Azure Sentinel",
+        "",
+        "## Alert Details",
+        "The last day of activity (up to 10 alerts) is summarised below from newest to oldest.",
+        "### [Suspicious Login (Severity:High) - TimeGenerated 2023-01-01T10:00:00Z](https://portal.azure.com/alert/1)",
+        "Failed login attempts from unknown IP",
+        "",
+        "#### ExtendedProperties",
+        "- **Query Period:** 1 day",
+        "- **Script:**",
+        "",
+        "```",
+        "Get-Process | Where-Object {$_.CPU -gt 100}",
+        "```",
+        "",
+    ]
+)
+
+# Golden outputs in the Atlaskit transformer's format, trailing newline included
+GOLDEN = {
+    "wiki": (
+        "h1. SIEM Detection #12345 Sev:High - Suspicious Login Activity (Status:Active)\n\n"
+        "h2. [SecurityIncident #12345 Details|https://portal.azure.com/incident/12345]\n\n"
+        "Multiple failed login attempts detected\n\n"
+        "* *Alert Classification:* TruePositive\n"
+        "* *Product Names:* Azure Sentinel\n\n"
+        "h2. Alert Details\n\n"
+        "The last day of activity (up to 10 alerts) is summarised below from newest to oldest.\n\n"
+        "h3. [Suspicious Login (Severity:High) - TimeGenerated 2023-01-01T10:00:00Z"
+        "|https://portal.azure.com/alert/1]\n\n"
+        "Failed login attempts from unknown IP\n\n"
+        "h4. ExtendedProperties\n\n"
+        "* *Query Period:* 1 day\n"
+        "* *Script:*\n\n"
+        "{code}Get-Process | Where-Object {$_.CPU -gt 100}{code}\n"
+    ),
+}
+
+
+def test_incident_markdown_matches_golden_wiki():
+    """Test that incident-shaped markdown renders to the expected wiki markup."""
+    assert fast_transform(INCIDENT) == GOLDEN["wiki"]
+
+
+def test_incident_markdown_renders_adf():
+    """Test that the same document renders to an ADF tree with matching structure."""
+    doc = json.loads(fast_transform(INCIDENT, "md", "adf"))
+
+    assert doc["version"] == 1 and doc["type"] == "doc"
+    assert [node["type"] for node in doc["content"]][:4] == [
+        "heading",
+        "heading",
+        "paragraph",
+        "bulletList",
+    ]
+    link = doc["content"][1]["content"][0]
+    assert link["marks"] == [
+        {"type": "link", "attrs": {"href": "https://portal.azure.com/incident/12345"}}
+    ]
+    item = doc["content"][3]["content"][0]["content"][0]["content"]
+    assert item == [
+        {"type": "text", "marks": [{"type": "strong"}], "text": "Alert Classification:"},
+        {"type": "text", "text": " TruePositive"},
+    ]
+    assert doc["content"][-1] == {
+        "type": "codeBlock",
+        "attrs": {"language": None},
+        "content": [{"type": "text", "text": "Get-Process | Where-Object {$_.CPU -gt 100}"}],
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "line one\nline two",  # soft line break
+        "- a\nlazy continuation",
+        "- a\n* b",  # marker change
+        "- a\n  - nested",
+        "1. ordered",
+        "> quote",
+        "| a | b |",
+        "*emphasis*",
+        "snake_case",
+        "`code`",
+        "see portal.azure.com",
+        "contact admin@example.com",
+        "x -- y",
+        "(i) note",
+        "**bold**suffix",
+        "```\nunclosed",
+        "# Heading #",
+        "trailing space ",
+    ],
+)
+def test_outside_subset_falls_back(text):
+    """Test that anything outside the subset is left to the full transformer."""
+    assert parse_subset(text) is None
+    assert fast_transform(text) is None
+
+
+def test_other_formats_fall_back():
+    """Test that only markdown to wiki or ADF is handled in-process."""
+    assert fast_transform("plain", "wiki", "md") is None
+    assert fast_transform("plain", "md", "md") is None
+    assert fast_transform("", "md", "wiki") == "\n"
+
+
+def test_fast_transform_many_matches_single():
+    """Test that a batch sharing lines renders each document as fast_transform does."""
+    texts = [INCIDENT, INCIDENT.replace("12345", "67890"), "- a\n* b", INCIDENT]
+    for outputfmt in ("wiki", "adf"):
+        assert fast_transform_many(texts, "md", outputfmt) == [
+            fast_transform(text, "md", outputfmt) for text in texts
+        ]
+    assert fast_transform_many(texts, "wiki", "md") == [None] * 4
+
+
+def test_atlaskit_transformer_skips_node_for_subset():
+    """Test that subset documents never start a transformer process."""
+    from unittest.mock import patch
+
+    from wagov_squ.api import atlaskit_transformer
+
+    with patch("wagov_squ.api.transformer_pool") as pool:
+        pool.return_value.transform_many.return_value = ["from node\n"]
+        assert atlaskit_transformer("# Title") == "h1. Title\n"
+        assert atlaskit_transformer(["- a", "*em*", "b"]) == ["* a\n", "from node\n", "b\n"]
+
+    pool.return_value.transform.assert_not_called()
+    pool.return_value.transform_many.assert_called_once_with(["*em*"], "md", "wiki")
+
+
+def _node_transformer():
+    """The bundled transformer, or None where the bundle or node isn't available."""
+    from wagov_squ.transformer import transformer_pool
+
+    if not shutil.which("node"):
+        return None
+    try:
+        return transformer_pool("node")
+    except FileNotFoundError:
+        return None
+
+
+@pytest.mark.parametrize("outputfmt", ["wiki", "adf"])
+def test_fast_path_matches_atlaskit(outputfmt):
+    """Test that in-process output is identical to the Atlaskit bundle's."""
+    pool = _node_transformer()
+    if pool is None:
+        pytest.skip("Atlaskit bundle or node not available")
+
+    for text in [INCIDENT, "# Title\n\nplain text", "- **a:** b\n\n- c"]:
+        expected = pool.transform(text, "md", outputfmt)
+        if outputfmt == "adf":
+            assert json.loads(fast_transform(text, "md", outputfmt)) == json.loads(expected)
+        else:
+            assert fast_transform(text, "md", outputfmt) == expected
@@ -0,0 +1,95 @@
+"""Tests for scheduling module."""
+
+from wagov_squ.scheduling import WorkspaceStats
+
+
+def test_workspace_stats_moving_average(tmp_path):
+    """Test that samples are folded into per-workspace moving averages."""
+    stats = WorkspaceStats(tmp_path / "stats.sqlite", alpha=0.5)
+    stats.record([("ws-a", 10.0, 100)])
+    stats.record([("ws-a", 20.0, 300)])
+
+    assert stats.expected() == {"ws-a": (15.0, 200.0)}
+
+
+def test_workspace_stats_orders_longest_first(tmp_path):
+    """Test that unknown workspaces sort with the slowest, ahead of fast ones."""
+    stats = WorkspaceStats(tmp_path / "stats.sqlite")
+    stats.record([("fast", 1.0, 10), ("slow", 60.0, 5000), ("medium", 5.0, 10)])
+
+    assert stats.order(["fast", "new", "medium", "slow"]) == ["new", "slow", "medium", "fast"]
+
+
+def test_workspace_stats_unavailable_store(tmp_path):
+    """Test that an unusable store degrades to no history."""
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    stats = WorkspaceStats(blocker / "stats.sqlite")
+
+    stats.record([("ws-a", 1.0, 1)])
+    assert stats.expected() == {}
+    assert stats.order(["b", "a"]) == ["b", "a"]
+
+
+def test_batch_scheduler_interactive_overtakes_bulk():
+    """Test that a waiting interactive batch is granted before an earlier queued bulk batch."""
+    import threading
+    import time
+
+    from wagov_squ.scheduling import BatchScheduler
+
+    scheduler = BatchScheduler({"interactive": 8.0, "bulk": 1.0})
+    pacing = {"cost": 1, "rate": 1 / 0.3, "burst": 1}
+    assert scheduler.acquire("bulk", **pacing)  # empties the bucket for the next 0.3s
+    granted = []
+
+    def run(priority):
+        scheduler.acquire(priority, **pacing)
+        granted.append(priority)
+
+    bulk = threading.Thread(target=run, args=("bulk",))
+    interactive = threading.Thread(target=run, args=("interactive",))
+    bulk.start()
+    time.sleep(0.05)
+    interactive.start()
+    bulk.join(2)
+    interactive.join(2)
+
+    assert granted == ["interactive", "bulk"]
+
+
+def test_batch_scheduler_timeout():
+    """Test that acquire gives up once its timeout passes."""
+    import pytest
+
+    from wagov_squ.scheduling import BatchScheduler
+
+    scheduler = BatchScheduler({"interactive": 1.0})
+    assert scheduler.acquire(rate=0.2)
+    assert not scheduler.acquire(rate=0.2, timeout=0.1)
+    with pytest.raises(ValueError, match="Unknown priority"):
+        scheduler.acquire("urgent")
+
+
+def test_host_token_bucket_shared_between_instances(tmp_path):
+    """Test that buckets backed by the same file share one budget, as separate processes would."""
+    from wagov_squ.scheduling import HostTokenBucket
+
+    first = HostTokenBucket(tmp_path / "rate.sqlite")
+    second = HostTokenBucket(tmp_path / "rate.sqlite")
+
+    assert first.try_acquire(190, rate=190 / 32, burst=190) == 0
+    wait = second.try_acquire(190, rate=190 / 32, burst=190)
+    assert 31 < wait <= 32
+
+
+def test_host_token_bucket_falls_back_to_process_local(tmp_path):
+    """Test that an unusable bucket file degrades to pacing within the process."""
+    from wagov_squ.scheduling import HostTokenBucket
+
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    bucket = HostTokenBucket(blocker / "rate.sqlite")
+
+    assert bucket.try_acquire(2, rate=1, burst=2) == 0
+    assert bucket.try_acquire(1, rate=1, burst=2) > 0
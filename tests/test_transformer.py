@@ -0,0 +1,184 @@
+"""Tests for transformer module."""
+
+import shutil
+import sys
+import textwrap
+
+import pytest
+
+from wagov_squ.exceptions import TransformError
+from wagov_squ.transformer import TransformerPool, TransformerWorker
+
+# Stand-in for `atlaskit-transformer.js --server`: upper-cases input, fails on "boom", exits on "die"
+FAKE_SERVER = textwrap.dedent(
+    """
+    import json, os, sys
+    for line in sys.stdin:
+        request = json.loads(line)
+        if request["input"] == "die":
+            sys.exit(1)
+        if request["input"] == "boom":
+            response = {"id": request["id"], "error": "cannot parse"}
+        else:
+            output = f"{os.getpid()}:{request['from']}>{request['to']}:{request['input'].upper()}"
+            response = {"id": request["id"], "output": output}
+        print(json.dumps(response), flush=True)
+    """
+)
+
+
+@pytest.fixture
+def command(tmp_path):
+    script = tmp_path / "fake_transformer.py"
+    script.write_text(FAKE_SERVER)
+    return [sys.executable, str(script)]
+
+
+def test_worker_starts_lazily_and_stays_up(command):
+    """Test that one worker process serves consecutive documents."""
+    worker = TransformerWorker(command)
+    assert worker.process is None
+
+    first = worker.transform("# a")
+    second = worker.transform("b", "md", "adf")
+    worker.close()
+
+    pid = first.split(":")[0]
+    assert first == f"{pid}:md>wiki:# A"
+    assert second == f"{pid}:md>adf:B"
+
+
+def test_worker_restarts_after_crash(command):
+    """Test that a worker whose process died is restarted for the next document."""
+    worker = TransformerWorker(command)
+    first_pid = worker.transform("a").split(":")[0]
+    worker.process.kill()
+    worker.process.wait()
+
+    assert worker.transform("b").split(":")[0] != first_pid
+    with pytest.raises(BrokenPipeError):
+        worker.transform("die")  # dies on the retry too
+    assert worker.transform("c").endswith(":C")
+    worker.close()
+
+
+def test_worker_reports_transform_errors(command):
+    """Test that transformer errors surface as TransformError without killing the worker."""
+    worker = TransformerWorker(command)
+    with pytest.raises(TransformError, match="cannot parse"):
+        worker.transform("boom")
+    assert worker.transform("ok").endswith(":OK")
+    worker.close()
+
+
+def test_pool_runs_separate_workers(command):
+    """Test that a pool hands concurrent documents to different processes."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = TransformerPool(command, size=2)
+    with ThreadPoolExecutor(4) as executor:
+        outputs = list(executor.map(pool.transform, [str(i) for i in range(20)]))
+    pool.close()
+
+    assert [output.split(":")[-1] for output in outputs] == [str(i) for i in range(20)]
+    assert len({output.split(":")[0] for output in outputs}) <= 2
+
+
+def test_worker_batch_isolates_failures(command):
+    """Test that a batch keeps order and returns failed documents as TransformError in place."""
+    worker = TransformerWorker(command)
+    texts = [f"doc {i}" for i in range(2000)]  # larger than a pipe buffer in both directions
+    texts[3] = "boom"
+    texts[7] = "die"
+
+    results = worker.transform_many(texts)
+    worker.close()
+
+    assert isinstance(results[3], TransformError)
+    assert isinstance(results[7], TransformError)
+    outputs = [r for i, r in enumerate(results) if i not in (3, 7)]
+    assert [r.split(":")[-1] for r in outputs] == [
+        t.upper() for i, t in enumerate(texts) if i not in (3, 7)
+    ]
+
+
+def test_pool_batch_spreads_across_workers(command):
+    """Test that a pool splits a batch between its workers and reassembles it in order."""
+    pool = TransformerPool(command, size=3)
+    results = pool.transform_many([str(i) for i in range(10)], "md", "adf")
+    pool.close()
+
+    assert [r.split(":")[-1] for r in results] == [str(i) for i in range(10)]
+    assert len({r.split(":")[0] for r in results}) == 3
+    assert pool.transform_many([]) == []
+
+
+def test_atlaskit_transformer_accepts_list(command):
+    """Test that atlaskit_transformer returns a list for a list of documents."""
+    from unittest.mock import patch
+
+    from wagov_squ.api import atlaskit_transformer
+
+    pool = TransformerPool(command)
+    with patch("wagov_squ.api.transformer_pool", return_value=pool):
+        assert atlaskit_transformer("a", fastpath=False).endswith(":A")
+        results = atlaskit_transformer(["a", "boom"], fastpath=False)
+    pool.close()
+
+    assert results[0].endswith(":A")
+    assert isinstance(results[1], TransformError)
+
+
+@pytest.fixture
+def stub_bundle(tmp_path):
+    """atlaskit-transformer.js with the Atlaskit imports replaced by an upper-casing stub."""
+    from pathlib import Path
+
+    source = (Path(__file__).parents[1] / "atlaskit-transformer.js").read_text()
+    stub = (
+        "class T { parse(x) { return x.toUpperCase(); } encode(x) { return x.trim(); } }\n"
+        "const MarkdownTransformer = T, JSONTransformer = T, WikiMarkupTransformer = T;\n"
+    )
+    lines = [line for line in source.splitlines() if not line.startswith("import ")]
+    bundle = tmp_path / "atlaskit-transformer.bundle_v0.js"
+    bundle.write_text(stub + "\n".join(lines))
+    return bundle
+
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node is not installed")
+def test_pool_starts_from_snapshot(stub_bundle):
+    """Test that a built snapshot is picked up by transformer_pool and converts like the bundle."""
+    from unittest.mock import patch
+
+    from wagov_squ import transformer
+
+    with patch.object(transformer, "atlaskit_bundle", return_value=stub_bundle):
+        plain = transformer.transformer_pool("node")
+        assert plain.workers[0].command == ["node", str(stub_bundle)]
+        expected = plain.transform("a\nb")
+
+        snapshot = transformer.build_atlaskit_snapshot("node")
+        assert snapshot.parent == stub_bundle.parent and snapshot.suffix == ".blob"
+        pool = transformer.transformer_pool("node")
+        assert pool.workers[0].command == ["node", "--snapshot-blob", str(snapshot), "--"]
+        assert pool.transform("a\nb") == expected == "A\nB\n"
+        assert pool.transform_many(["c", "d"]) == ["C\n", "D\n"]
+    transformer._pools.pop(("node", str(stub_bundle), 1)).close()
+    transformer._pools.pop(("node", "--snapshot-blob", str(snapshot), "--", 1)).close()
+
+
+def test_snapshot_name_tracks_runtime(tmp_path):
+    """Test that the snapshot name changes when the runtime binary changes."""
+    from unittest.mock import patch
+
+    from wagov_squ.transformer import atlaskit_snapshot
+
+    runtime = tmp_path / "node"
+    runtime.write_text("v1")
+    with patch("wagov_squ.transformer.atlaskit_bundle", return_value=tmp_path / "bundle_v1.js"):
+        first = atlaskit_snapshot(str(runtime))
+        runtime.write_text("v2 with a different size")
+        second = atlaskit_snapshot(str(runtime))
+
+    assert first.name.startswith("bundle_v1.") and first.suffix == ".blob"
+    assert first != second